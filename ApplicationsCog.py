@@ -754,6 +754,7 @@ class ApplicationsCog(commands.Cog):
                 # update to the more recent profile link if set through app
                 if profile_link != "no site":
                     member.profile_link = profile_link
+                    memblist.reindex()
                 # try to update site if not already updated
                 elif zerobot_common.site_enabled:
                     if valid_profile_link(member.profile_link):
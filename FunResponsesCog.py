@@ -28,7 +28,9 @@ memers = [
 ]
 def nbr(channel):
     if zerobot_common.memberlist_enabled:
-        mlist = memberlist_from_disk(zerobot_common.current_members_filename)
+        mlist = memberlist_from_disk(
+            zerobot_common.current_members_filename, lazy=True
+        )
     name = random.choice(mlist).name
     val = random.random()
     if val <= 0.2:
@@ -82,7 +84,9 @@ def will(channel):
     val = random.random()
     if val <= 0.1:
         if zerobot_common.memberlist_enabled:
-            mlist = memberlist_from_disk(zerobot_common.current_members_filename)
+            mlist = memberlist_from_disk(
+                zerobot_common.current_members_filename, lazy=True
+            )
         name = random.choice(mlist).name
         return f"Ask {random.choice(memers + [name])}!"
     if val <= 0.15:
@@ -99,7 +103,9 @@ def when(channel):
     val = random.random()
     if val <= 0.1:
         if zerobot_common.memberlist_enabled:
-            mlist = memberlist_from_disk(zerobot_common.current_members_filename)
+            mlist = memberlist_from_disk(
+                zerobot_common.current_members_filename, lazy=True
+            )
         name = random.choice(mlist).name
         return f"Ask {random.choice(memers + [name])}!"
     if val <= 0.2:
@@ -130,7 +136,9 @@ def retaliate(channel, name):
         return f"{name} I will ban you!"
 def who(self, channel):
     if zerobot_common.memberlist_enabled:
-        mlist = memberlist_from_disk(zerobot_common.current_members_filename)
+        mlist = memberlist_from_disk(
+            zerobot_common.current_members_filename, lazy=True
+        )
     name = random.choice(mlist).name
     val = random.random()
     if val <= 0.1:
@@ -13,7 +13,9 @@ How to safely edit the memberlist:
    Calling unlock() signals that you wont make more changes and that the next
    function can start making its edits, this prevents conflicts. 
    The lock / unlock steps also handle all the synching to the disk and google
-   drive spreadsheet for you so there's no need to update those.
+   drive spreadsheet for you so there's no need to update those. The writes
+   happen in the background a few seconds after unlock, await 
+   membcog.flush_memberlists() if you need them done right away.
    DO NOT keep copies of lists or individual members after unlock or be very 
    certain you do not edit them in any way. It can cause editing conflicts or 
    can desync the lists in memory from the ones on the disk / google drive.
@@ -27,7 +29,9 @@ from discord import Interaction
 from datetime import datetime, timedelta
 from logfile import LogFile
 import asyncio
+import os
 import re
+import numpy
 # custom modules
 import zerobot_common
 import utilities
@@ -49,23 +53,46 @@ from rankchecks import (
     TodosUpdateRanks,
     update_discord_info
 )
-from clantrack import get_ingame_memberlist, compare_lists
+from clantrack import (
+    get_ingame_memberlist,
+    compare_lists,
+    discard_ingame_journals,
+    apply_refreshed_stats,
+    RollingRefresh
+)
+from update_worker import (
+    UpdateWorker,
+    fetch_ingame_memberlist,
+    compare_memberlists
+)
 from searchresult import SearchResult
 from memberembed import member_embed
+from membertable import MemberTable, epoch_days
+from memberlist_events import EventLog
+from stat_history import StatHistory, stat_columns
+from memberlist_archive import (
+    MemberlistArchive,
+    backup_filename,
+    remove_archived_backups
+)
 import memberlist
+from namesearch import NameSearchIndex
 from memberlist import (
     join_date_cond,
     memberlist_sort,
     memberlist_sort_name,
-    memberlist_sort_clan_xp,
     memberlist_sort_leave_date,
     memberlist_from_disk,
+    memberlist_from_string,
     memberlist_to_disk,
     memberlist_get,
+    memberlist_lookup,
+    storage_stamp,
+    memberlist_add,
     memberlist_remove,
     memberlist_move,
-    memberlist_get_all,
-    memberlist_compare_stats
+    memberlist_compare_stats,
+    index_memberlists
 )
 from member import (
     Member,
@@ -75,6 +102,7 @@ from member import (
 )
 from exceptions import (
     BannedUserError,
+    ClanListError,
     ExistingUserWarning,
     MemberNotFoundError,
     NotACurrentMemberError,
@@ -116,28 +144,30 @@ def _Inactives(days):
     Returns a list of players that have been inactive for more than the 
     specified number of days. List is sorted by lowest clan xp first.
     """
-    memberlist = memberlist_from_disk(zerobot_common.current_members_filename)
-    today = datetime.utcnow()
+    table = MemberTable(
+        memberlist_from_disk(zerobot_common.current_members_filename)
+    )
+    exceptions = zerobot_common.inactive_exceptions.keys()
+    # no last active date = inactive since the start of activity tracking
+    tracking_start = datetime.strptime("2020-04-14", utilities.dateformat)
+    last_active = table.last_active.copy()
+    unknown = numpy.isnan(last_active)
+    last_active[unknown] = epoch_days(tracking_start)
+    days_inactive = epoch_days(datetime.utcnow()) - last_active
+    inactive = (
+        (days_inactive >= days)
+        & ~table.rows_in(table.discord_rank, exceptions)
+        & ~table.rows_in(table.name, exceptions)
+    )
+    rows = numpy.flatnonzero(inactive)
+    rows = rows[numpy.argsort(table.clan_xp[rows], kind="stable")]
     results = list()
-    for memb in memberlist:
-        if memb.discord_rank in zerobot_common.inactive_exceptions.keys():
-            continue
-        if memb.name in zerobot_common.inactive_exceptions.keys():
-            continue
-        if memb.last_active == None:
-            days_inactive = today - datetime.strptime(
-                "2020-04-14", utilities.dateformat
-            )
-            memb.last_active = datetime.strptime(
-                "2020-04-14", utilities.dateformat
-            )
-        else:
-            days_inactive = today - memb.last_active
-        if days_inactive.days >= days:
-            memb.days_inactive = days_inactive.days
-            results.append(memb)
-    
-    memberlist_sort_clan_xp(results)
+    for row in rows:
+        memb = table.members[row]
+        if unknown[row]:
+            memb.last_active = tracking_start
+        memb.days_inactive = int(days_inactive[row])
+        results.append(memb)
     return results
 
 def _Need_Full_Reqs():
@@ -148,7 +178,9 @@ def _Need_Full_Reqs():
     req_start_date = _strToDate("2021-09-27")
     req_time_days = 90
     today = datetime.utcnow()
-    mlist = memberlist_from_disk(zerobot_common.current_members_filename)
+    mlist = memberlist_from_disk(
+        zerobot_common.current_members_filename, lazy=True
+    )
     need_full = []
 
     for memb in mlist:
@@ -334,6 +366,18 @@ async def warn_duplicates(self):
     await send_multiple(zerobot_common.bot_channel, res, codeblock=True)
 
 
+def backup_memberlist(self, kind, date_str, mlist):
+    """
+    Stores the daily backup of mlist, one of the archive_kinds. Goes in the
+    memberlist archive if enabled, a memberlist file in its folder otherwise.
+    """
+    if self.archive is not None:
+        self.archive.store(
+            kind, date_str, [memb.to_string() for memb in mlist]
+        )
+        return
+    memberlist_to_disk(mlist, backup_filename(kind, date_str))
+
 async def daily_update(self):
     """
     The actual daily update process.
@@ -356,16 +400,44 @@ async def daily_update(self):
         "Starting to collect ingame data for update"
     )
 
-    # retrieve the latest ingame data as a new concurrent ask
-    ingame_members = await self.bot.loop.run_in_executor(
-        None, get_ingame_memberlist, self.highest_id, self.highest_entry_id
-    )
+    if zerobot_common.drive_functions_enabled:
+        await self.bot.loop.run_in_executor(None, zerobot_common.drive_connect)
+    # retrieve the latest ingame data in the worker process
+    try:
+        ingame_members = await run_heavy(
+            self,
+            fetch_ingame_memberlist,
+            get_ingame_memberlist,
+            self.highest_id,
+            self.highest_entry_id
+        )
+    except ClanListError as e:
+        # without the clan list everyone would look like they left
+        self.logfile.log(f"Daily update aborted: {e}")
+        await zerobot_common.bot_channel.send(
+            f"Daily update aborted, could not get the ingame clan list: {e}"
+        )
+        return
     # backup ingame members right away, nice for testing
     date_str = datetime.utcnow().strftime(utilities.dateformat)
     ing_backup_name = (
         "memberlists/current_members/ingame_membs_" + date_str + ".txt"
     )
-    memberlist_to_disk(ingame_members, ing_backup_name)
+    # always kept as file as well, used as cached ingame data for today
+    await self.bot.loop.run_in_executor(
+        None, memberlist_to_disk, ingame_members, ing_backup_name
+    )
+    if self.archive is not None:
+        await self.bot.loop.run_in_executor(
+            None, backup_memberlist, self, "ingame_membs", date_str,
+            ingame_members
+        )
+        await self.bot.loop.run_in_executor(
+            None, remove_archived_backups, self.archive, "ingame_membs",
+            date_str
+        )
+    # backup has all the ingame data now, no need to resume from journal
+    discard_ingame_journals()
     
     # post update warning on discord
     await zerobot_common.bot_channel.send("Daily update starting")
@@ -373,18 +445,28 @@ async def daily_update(self):
     #=== try to obtain editing lock, loads sheet changes ===
     await self.lock()
     if zerobot_common.sheet_memberlist_enabled:
-        clear_sheets()
+        await self.bot.loop.run_in_executor(None, clear_sheets)
     # compare against new ingame data to find joins, leaves, renames
-    comp_res = compare_lists(ingame_members, self.current_members)
+    comp_res = await run_heavy(
+        self,
+        compare_memberlists,
+        compare_lists,
+        ingame_members,
+        self.current_members
+    )
     # use result to update our list of current members
     self.current_members = (
         comp_res.staying + comp_res.joining + comp_res.renamed
     )
     # get site updates, send list to siteops func that updates it
-    update_discord_info(self.current_members)
+    await self.bot.loop.run_in_executor(
+        None, update_discord_info, self.current_members
+    )
     self.logfile.log("retrieved discord user changes...")
     if zerobot_common.site_enabled:
-        zerobot_common.siteops.update_site_info(self.current_members)
+        await self.bot.loop.run_in_executor(
+            None, zerobot_common.siteops.update_site_info, self.current_members
+        )
     self.logfile.log("retrieved site user changes...")
     # for leaving members remove discord roles, set site rank to retired
     await process_leaving_members(self, comp_res.leaving)
@@ -397,27 +479,48 @@ async def daily_update(self):
     # check memberlists for duplicate discord ids
     await warn_duplicates(self)
     self.logfile.log("checked the memberlists for duplicates...")
+    # new list of current members, and renames / discord and site changes
+    self.reindex()
 
     # write updated memberlists to disk as backup
-    cur_backup_name = (
-        "memberlists/current_members/current_membs_" + date_str + ".txt"
+    await self.bot.loop.run_in_executor(
+        None, backup_memberlist, self, "current_membs", date_str,
+        self.current_members
     )
-    old_backup_name = (
-        "memberlists/old_members/old_membs_" + date_str + ".txt"
+    await self.bot.loop.run_in_executor(
+        None, backup_memberlist, self, "old_membs", date_str,
+        self.old_members
     )
-    ban_backup_name = (
-        "memberlists/banned_members/banned_membs_" + date_str + ".txt"
+    await self.bot.loop.run_in_executor(
+        None, backup_memberlist, self, "banned_membs", date_str,
+        self.banned_members
     )
-    memberlist_to_disk(self.current_members, cur_backup_name)
-    memberlist_to_disk(self.old_members, old_backup_name)
-    memberlist_to_disk(self.banned_members, ban_backup_name)
+
+    if self.stat_history is not None:
+        await self.bot.loop.run_in_executor(
+            None, self.stat_history.append, datetime.utcnow(),
+            self.current_members
+        )
 
     #=== release editing lock, writes to sheet and disk ===
     await self.unlock()
+    # right away, snapshot and sheet colors need the written lists
+    await self.flush_memberlists()
+    if self.event_log is not None and self.event_log.snapshot_due():
+        await self.bot.loop.run_in_executor(None, self.event_log.snapshot)
+    if self.event_log is not None:
+        await self.bot.loop.run_in_executor(None, self.event_log.prune)
+    if memberlist.database is not None:
+        await self.bot.loop.run_in_executor(
+            None,
+            memberlist.database.snapshot_stats,
+            date_str,
+            [memb.to_string() for memb in self.current_members]
+        )
     
     #update colors on sheet
     if zerobot_common.sheet_memberlist_enabled:
-        color_spreadsheet()
+        await self.bot.loop.run_in_executor(None, color_spreadsheet)
 
     # post summary of changes
     await zerobot_common.bot_channel.send(comp_res.summary())
@@ -429,6 +532,22 @@ async def daily_update(self):
     to_update_rank = TodosUpdateRanks(self.current_members)
     await send_multiple(zerobot_common.bot_channel, to_update_rank, codeblock=True)
 
+async def run_heavy(self, worker_func, func, *args):
+    """
+    Runs a heavy daily update step off the event loop. Runs worker_func in 
+    the update worker process if enabled, otherwise runs func in a thread.
+    """
+    if zerobot_common.update_worker_enabled:
+        return await self.update_worker.run(worker_func, *args)
+    return await self.bot.loop.run_in_executor(None, func, *args)
+
+async def report_update_progress(msg):
+    """
+    Posts progress messages from the update worker in the bot channel.
+    """
+    memberlist_log.log(msg)
+    await zerobot_common.bot_channel.send(msg)
+
 async def process_leaving_member(self, memb):
     self.logfile.log(
         f" - {memb.name} is leaving, updating discord and site ranks..."
@@ -439,7 +558,7 @@ async def process_leaving_member(self, memb):
         memb.leave_date = today_date
     if (memb.leave_reason == ""):
         memb.leave_reason = "left or inactive kick"
-    self.old_members.append(memb)
+    memberlist_add(self.old_members, memb)
     rank_index = utilities.rank_index(discord_role_name=memb.discord_rank)
     if rank_index is None:
         await zerobot_common.bot_channel.send(
@@ -487,6 +606,50 @@ async def process_leaving_members(self, leaving_list):
     for memb in leaving_list:
         await process_leaving_member(self, memb)
 
+@tasks.loop(minutes=30, reconnect=False)
+async def rolling_refresh_scheduler(self):
+    """
+    Polls the clan list and refreshes the stats of recently active members,
+    interval is set from the rolling_refresh_minutes setting.
+    """
+    try:
+        clan_list = await self.bot.loop.run_in_executor(
+            None, self.rolling_refresh.poll
+        )
+    except ClanListError as e:
+        # tried again at the next poll
+        self.logfile.log(f"Rolling refresh skipped: {e}")
+        return
+    except Exception as e:
+        # the loop stops for good on an exception, try again next poll
+        self.logfile.log_exception(e)
+        return
+    # joins, leaves and renames are left for the daily update
+    list_access = await self.lock(skip_sheet=True)
+    try:
+        for ingame_memb in clan_list:
+            memb = memberlist_get(
+                list_access["current_members"], ingame_memb.name
+            )
+            if memb is not None:
+                apply_refreshed_stats(memb, ingame_memb)
+    except Exception as e:
+        self.logfile.log_exception(e)
+    finally:
+        await self.unlock(skip_sheet=True)
+
+@tasks.loop(seconds=10, reconnect=False)
+async def memberlist_writer(self):
+    """
+    Writes the edits made to the memberlists since the last write, interval
+    is set from the memberlist_write_seconds setting.
+    """
+    try:
+        await self.flush_memberlists()
+    except Exception as e:
+        # tried again next time, the edits are still marked as not written
+        self.logfile.log_exception(e)
+
 def get_highest_ids(self):
     # could switch to highest unused id but thats unnecessary complexity atm
     highest_id = 0
@@ -531,16 +694,65 @@ class MemberlistCog(commands.Cog):
         self.banned_members = memberlist_from_disk(
             zerobot_common.banned_members_filename
         )
+        self.reindex()
+        # lists now include any edits from the journal, start a fresh one
+        lines = self._memberlist_lines()
+        self.write_memberlists(lines)
+        self.archive = None
+        if zerobot_common.memberlist_archive_enabled:
+            self.archive = MemberlistArchive(
+                "memberlists/archive/",
+                zerobot_common.memberlist_archive_keyframe_days
+            )
+        self.stat_history = None
+        if zerobot_common.stat_history_enabled:
+            self.stat_history = StatHistory("memberlists/stats/")
+        self.event_log = None
+        if zerobot_common.memberlist_events_enabled:
+            self.event_log = EventLog(
+                "memberlists/events/",
+                zerobot_common.memberlist_snapshot_days,
+                zerobot_common.memberlist_events_keep_days
+            )
+            self.event_log.start(lines)
         # init highest used member id state
         self.highest_id = 0
         self.highest_entry_id = 0
         get_highest_ids(self)
 
         self.list_access = {}
+        # fuzzy name search for findmember, built on first use
+        self.name_search = NameSearchIndex()
+        # edits not written to disk / sheet yet, see unlock
+        self.lists_dirty = False
+        self.sheet_dirty = False
+        if zerobot_common.memberlist_write_seconds > 0:
+            memberlist_writer.change_interval(
+                seconds=zerobot_common.memberlist_write_seconds
+            )
+            try:
+                memberlist_writer.start(self)
+            except RuntimeError:
+                # loop already running, happens when reconnecting.
+                pass
+        # separate process for the heavy parts of the daily update
+        self.update_worker = UpdateWorker(report_update_progress)
 
         if zerobot_common.daily_mlist_update_enabled:
             bot.daily_callbacks.append((daily_update, [self]))
         bot.on_message_callbacks.append((on_message_hostcounter, [self]))
+        if zerobot_common.rolling_refresh_enabled:
+            self.rolling_refresh = RollingRefresh(
+                zerobot_common.rolling_refresh_minutes
+            )
+            rolling_refresh_scheduler.change_interval(
+                minutes=zerobot_common.rolling_refresh_minutes
+            )
+            try:
+                rolling_refresh_scheduler.start(self)
+            except RuntimeError:
+                # loop already running, happens when reconnecting.
+                pass
         bot.daily_callbacks.append(
             (
                 self.post_inactives,
@@ -592,15 +804,31 @@ class MemberlistCog(commands.Cog):
             await asyncio.sleep(interval)
         self.updating = True
         if not skip_sheet and zerobot_common.sheet_memberlist_enabled:
-            load_sheet_changes(
-                self.current_members, zerobot_common.current_members_sheet
+            # sheet needs the earlier edits first, or loading the sheet would
+            # see them as changes made on the sheet and undo them
+            if self.sheet_dirty:
+                await self._write_pending()
+            # sheet requests are slow, keep them off the event loop
+            await self.bot.loop.run_in_executor(
+                None,
+                load_sheet_changes,
+                self.current_members,
+                zerobot_common.current_members_sheet
             )
-            load_sheet_changes(
-                self.old_members, zerobot_common.old_members_sheet
+            await self.bot.loop.run_in_executor(
+                None,
+                load_sheet_changes,
+                self.old_members,
+                zerobot_common.old_members_sheet
             )
-            load_sheet_changes(
-                self.banned_members, zerobot_common.banned_members_sheet
+            await self.bot.loop.run_in_executor(
+                None,
+                load_sheet_changes,
+                self.banned_members,
+                zerobot_common.banned_members_sheet
             )
+            # names and ids can be edited on the sheet
+            self.reindex()
             await warnings_from_sheet(self)
             # check if highest id states changed on sheet
             get_highest_ids(self)
@@ -611,7 +839,9 @@ class MemberlistCog(commands.Cog):
     async def unlock(self, skip_sheet = False):
         """
         Signals that you finished accessing and editing the memberlist.
-        Writes the current version of the memberlist to drive / sheet.
+        Marks the memberlists as edited, the background writer writes them to
+        disk and drive / sheet at its next interval. Edits of several unlocks
+        in a row are written at once. skip_sheet only writes them to disk.
 
         Revokes access to the memberlist by clearing the references from the
         dictionary. As long as the function calling lock() did not make copies
@@ -627,29 +857,141 @@ class MemberlistCog(commands.Cog):
         self.list_access["old_members"] = None
         self.list_access["banned_members"] = None
 
-        memberlist_to_disk(
-            self.current_members, zerobot_common.current_members_filename
-        )
-        memberlist_to_disk(
-            self.old_members, zerobot_common.old_members_filename
-        )
-        memberlist_to_disk(
-            self.banned_members, zerobot_common.banned_members_filename
-        )
-
-        if not skip_sheet and zerobot_common.sheet_memberlist_enabled:
-            memberlist_to_sheet(
-                self.current_members, zerobot_common.current_members_sheet
+        self.lists_dirty = True
+        if not skip_sheet:
+            self.sheet_dirty = True
+        if zerobot_common.memberlist_write_seconds <= 0:
+            await self._write_pending()
+        
+        self.updating = False
+    async def flush_memberlists(self):
+        """
+        Writes the edits not written yet to disk and drive / sheet right away.
+        Waits for the lock if someone is editing the memberlists.
+        """
+        if not self.lists_dirty and not self.sheet_dirty:
+            return
+        await self.lock(interval=1, skip_sheet=True)
+        try:
+            await self._write_pending()
+        finally:
+            self.list_access["current_members"] = None
+            self.list_access["old_members"] = None
+            self.list_access["banned_members"] = None
+            self.updating = False
+    async def _write_pending(self):
+        """
+        Writes the edits not written yet, only call while holding the lock.
+        """
+        if self.lists_dirty:
+            # serialising, journaling and syncing the lists takes a while,
+            # the lock keeps them from being edited in the meantime
+            await self.bot.loop.run_in_executor(None, self.store_memberlists)
+            self.lists_dirty = False
+        if self.sheet_dirty and zerobot_common.sheet_memberlist_enabled:
+            await self.bot.loop.run_in_executor(
+                None,
+                memberlist_to_sheet,
+                self.current_members,
+                zerobot_common.current_members_sheet
             )
-            memberlist_to_sheet(
-                self.old_members, zerobot_common.old_members_sheet
+            await self.bot.loop.run_in_executor(
+                None,
+                memberlist_to_sheet,
+                self.old_members,
+                zerobot_common.old_members_sheet
             )
-            memberlist_to_sheet(
-                self.banned_members, zerobot_common.banned_members_sheet
+            await self.bot.loop.run_in_executor(
+                None,
+                memberlist_to_sheet,
+                self.banned_members,
+                zerobot_common.banned_members_sheet
             )
-        
-        self.updating = False
+        self.sheet_dirty = False
+    async def cog_unload(self):
+        """
+        Called by discord.py when the bot shuts down, writes the edits the 
+        background writer did not get to yet.
+        """
+        memberlist_writer.stop()
+        try:
+            # don't keep the shutdown waiting on an edit that never unlocks
+            await asyncio.wait_for(self.flush_memberlists(), 120)
+        except asyncio.TimeoutError:
+            self.logfile.log("memberlists locked at shutdown, edits not written")
     
+    def reindex(self):
+        """
+        Rebuilds the indexes memberlist_get uses for the memberlists. Call
+        while holding the lock, after editing the names, old names, discord
+        ids, profile links or ids of members.
+        """
+        index_memberlists(
+            self.current_members, self.old_members, self.banned_members
+        )
+    def _memberlists(self):
+        """
+        Dictionary of list name -> (filename, memberlist).
+        """
+        return {
+            "current_members": (
+                zerobot_common.current_members_filename, self.current_members
+            ),
+            "old_members": (
+                zerobot_common.old_members_filename, self.old_members
+            ),
+            "banned_members": (
+                zerobot_common.banned_members_filename, self.banned_members
+            )
+        }
+    def _memberlist_lines(self):
+        """
+        Dictionary of list name -> member lines, as written to disk.
+        """
+        return {
+            name: [memb.to_string() for memb in mlist]
+            for name, (_, mlist) in self._memberlists().items()
+        }
+    def store_memberlists(self):
+        """
+        Stores the edits made to the memberlists. Appends them to the 
+        memberlist journal if possible, writes the full lists otherwise.
+        Also records them in the memberlist event log.
+        """
+        lines = self._memberlist_lines()
+        if self.event_log is not None:
+            self.event_log.record(lines)
+        journal = memberlist.journal
+        if journal is not None and journal.record(self._by_filename(lines)):
+            self._sync_database(lines)
+            return
+        self.write_memberlists(lines)
+    def write_memberlists(self, lines=None):
+        """
+        Writes the full memberlists to disk, and clears the journal.
+        """
+        for filename, mlist in self._memberlists().values():
+            memberlist_to_disk(mlist, filename)
+        if lines is None:
+            lines = self._memberlist_lines()
+        if memberlist.journal is not None:
+            memberlist.journal.reset(self._by_filename(lines))
+        self._sync_database(lines)
+    def _sync_database(self, lines):
+        """
+        Syncs the memberlist database to lines, after they are stored on 
+        disk. The stamps mark the database current with the files.
+        """
+        if memberlist.database is not None:
+            lists = self._by_filename(lines)
+            stamps = {
+                filename: storage_stamp(filename) for filename in lists
+            }
+            memberlist.database.sync(lists, stamps)
+    def _by_filename(self, lines):
+        files = self._memberlists()
+        return {files[name][0]: l for name, l in lines.items()}
+
     @commands.command()
     async def restart(self, ctx):
         # log command attempt and check if command allowed
@@ -883,8 +1225,11 @@ class MemberlistCog(commands.Cog):
             msg = f"Hosting stats of {member.display_name} "
         msg += "according to my information: ```"
 
-        memblist = memberlist_from_disk(zerobot_common.current_members_filename)
-        memb = memberlist_get(memblist, member.id)
+        # edits waiting for the background writer are not on disk yet
+        await self.flush_memberlists()
+        memb = memberlist_lookup(
+            zerobot_common.current_members_filename, member.id
+        )
         skip_listing = [
             "Nex Learner",
             "Raksha Learner",
@@ -999,8 +1344,8 @@ class MemberlistCog(commands.Cog):
             return
         # not confirmed yet, ask for confirm
         await ctx.send(
-            "Fully updating the memberlist spreadsheet can take a long time! "
-            "(~30 minutes!)\n The spreadsheet can not be edited while the "
+            "Fully updating the memberlist spreadsheet can take a while! "
+            "(a few minutes)\n The spreadsheet can not be edited while the "
             "update is running.\n If you are sure you want to start the "
             "update, type the command again within 30 seconds"
         )
@@ -1008,25 +1353,36 @@ class MemberlistCog(commands.Cog):
         await asyncio.sleep(30)
         self.confirmed_update = False
     
-    async def search_all(self, id):
+    async def search_all(self, id, partial=False):
         """
-        Searches the disk version of the 3 memberlists for id.
-        Can not be used to edit members. 
+        Searches the 3 memberlists for id, see memberlist_get_all. Includes
+        members with similar names or old names if partial. Results are 
+        copies, can not be used to edit members.
         Results may have outdated Discord roles / Site ranks / Ingame stats.
         """
         result = SearchResult()
-        current_members = memberlist_from_disk(
-            zerobot_common.current_members_filename
-        )
-        old_members = memberlist_from_disk(
-            zerobot_common.old_members_filename
-        )
-        banned_members = memberlist_from_disk(
-            zerobot_common.banned_members_filename
+        lists = [self.current_members, self.old_members, self.banned_members]
+        if isinstance(id, str) and not valid_profile_link(id):
+            # only rebuilt when names changed since the last search
+            self.name_search.update(lists)
+            found = self.name_search.search(id, partial)
+        else:
+            found = [
+                [(memb, "exactname") for memb in mlist if memb.matches_id(id)]
+                for mlist in lists
+            ]
+        results = []
+        for mlist_found in found:
+            copies = []
+            for memb, result_type in mlist_found:
+                # read only copy, only the stats of the results are needed
+                memb = Member.from_string(memb.to_string(), lazy=True)
+                memb.result_type = result_type
+                copies.append(memb)
+            results.append(copies)
+        result.current_results, result.old_results, result.banned_results = (
+            results
         )
-        result.current_results = memberlist_get_all(current_members, id)
-        result.old_results = memberlist_get_all(old_members, id)
-        result.banned_results = memberlist_get_all(banned_members, id)
         for memb in result.current_results:
             memb.status = "Current Member"
         for memb in result.old_results:
@@ -1077,6 +1433,8 @@ class MemberlistCog(commands.Cog):
         # fetch latest from sheet with lock -> unlock
         await self.lock()
         await self.unlock()
+        # write it to disk now instead of at the next background write
+        await self.flush_memberlists()
         # retrieve up to date, modifyable copy from disk
         mlist = memberlist_from_disk(zerobot_common.banned_members_filename)
         # sort last to leave first
@@ -1148,7 +1506,7 @@ class MemberlistCog(commands.Cog):
         except Exception:
             pass
         
-        results = await self.search_all(id)
+        results = await self.search_all(id, partial=True)
         if (len(results.combined_list()) == 0):
             await ctx.send("No results found in search.")
             return
@@ -1188,19 +1546,19 @@ class MemberlistCog(commands.Cog):
         await self.lock()
         for m in self.current_members:
             if m.entry_id == entry_id:
-                self.current_members.remove(m)
+                memberlist_remove(self.current_members, m)
                 await self.unlock()
                 m.sheet = "current_members"
                 return m
         for m in self.old_members:
             if m.entry_id == entry_id:
-                self.old_members.remove(m)
+                memberlist_remove(self.old_members, m)
                 await self.unlock()
                 m.sheet = "old_members"
                 return m
         for m in self.banned_members:
             if m.entry_id == entry_id:
-                self.banned_members.remove(m)
+                memberlist_remove(self.banned_members, m)
                 await self.unlock()
                 m.sheet = "banned_members"
                 return m
@@ -1226,6 +1584,7 @@ class MemberlistCog(commands.Cog):
                 edits.append(("banned_members", m.name, m.entry_id))
         if new_id > self.highest_id:
             self.highest_id = new_id
+        self.reindex()
         await self.unlock()
         return edits
     
@@ -1417,6 +1776,7 @@ class MemberlistCog(commands.Cog):
             if attribute == "entry_id":
                 if new_value > self.highest_entry_id:
                     self.highest_entry_id = new_value
+            self.reindex()
         await self.unlock()
 
         if memb is None:
@@ -1437,6 +1797,8 @@ class MemberlistCog(commands.Cog):
             zerobot_common.permissions.is_allowed("todos", ctx.channel.id)
         ): return
 
+        # edits waiting for the background writer are not on disk yet
+        await self.flush_memberlists()
         memberlist = memberlist_from_disk(
             zerobot_common.current_members_filename
         )
@@ -1501,6 +1863,8 @@ class MemberlistCog(commands.Cog):
             "\nThis means they are at risk of being removed for inactivity if "
             "there is not enough clan space for new members.\n"
         )
+        # edits waiting for the background writer are not on disk yet
+        await self.flush_memberlists()
         need_full = await self.bot.loop.run_in_executor(
             None, _Need_Full_Reqs
         )
@@ -1517,6 +1881,8 @@ class MemberlistCog(commands.Cog):
             - days_inactive: minimum days without activity to show up in list.
             - number_of_inactives: how many to post, sorted by least active.
         """
+        # edits waiting for the background writer are not on disk yet
+        await self.flush_memberlists()
         # get already sorted list of inactives, keep first n, format as line
         inactvs = await self.bot.loop.run_in_executor(
             None, _Inactives, days
@@ -1580,6 +1946,73 @@ class MemberlistCog(commands.Cog):
                 alt_ctx=ctx.channel
             )
 
+    @commands.command()
+    async def topgains(self, ctx, *args):
+        # log command attempt and check if command allowed
+        self.logfile.log(
+            f"{ctx.channel.name}:{ctx.author.name}:{ctx.message.content}"
+        )
+        if zerobot_common.permissions.not_allowed("topgains", ctx.channel.id):
+            return
+        use_msg = (
+            "Shows the members that gained the most of a stat. "
+            "\n `zbot topgains <stat> <days or date> <date>`"
+            "\nstat : clan_xp, kills, hosts, runescore, clues or the name of "
+            "a skill."
+            "\ndays or date : optional, since this many days ago or since this "
+            "date (yyyy-mm-dd). default is 30 days."
+            "\ndate : optional, until this date instead of today."
+        )
+        if self.stat_history is None:
+            await ctx.send("The stat history is not enabled.")
+            return
+        if len(args) == 0 or len(args) > 3:
+            await ctx.send(use_msg)
+            return
+        column = args[0].lower()
+        if column not in stat_columns:
+            column = "xp_" + column
+        if column not in stat_columns:
+            await ctx.send(f"Unknown stat: {args[0]}\n" + use_msg)
+            return
+        date_1 = datetime.utcnow() - timedelta(days=30)
+        date_2 = datetime.utcnow()
+        try:
+            if len(args) > 1:
+                try:
+                    date_1 = datetime.utcnow() - timedelta(days=int(args[1]))
+                except ValueError:
+                    date_1 = datetime.strptime(args[1], utilities.dateformat)
+            if len(args) > 2:
+                date_2 = datetime.strptime(args[2], utilities.dateformat)
+        except ValueError:
+            await ctx.send("Incorrect dateformat!\n" + use_msg)
+            return
+        top = await self.bot.loop.run_in_executor(
+            None, self.stat_history.top_gains, column, date_1, date_2
+        )
+        if len(top) == 0:
+            await ctx.send("No stats stored for those dates.")
+            return
+        # edits waiting for the background writer are not on disk yet
+        await self.flush_memberlists()
+        # old members first, current names win for entries in both
+        names = dict()
+        for filename in [
+            zerobot_common.old_members_filename,
+            zerobot_common.current_members_filename
+        ]:
+            for memb in memberlist_from_disk(filename, lazy=True):
+                names[memb.entry_id] = memb.name
+        date_string_1 = date_1.strftime(utilities.dateformat)
+        date_string_2 = date_2.strftime(utilities.dateformat)
+        res = [
+            f"Most {args[0]} gained from {date_string_1} to {date_string_2}:\n"
+        ]
+        for entry_id, gain in top:
+            res.append(f"{names.get(entry_id, entry_id)} : {gain}\n")
+        await send_multiple(ctx, res, codeblock=True)
+
     @commands.command()
     async def banlist(self, ctx):
         # log command attempt and check if command allowed
@@ -1590,6 +2023,8 @@ class MemberlistCog(commands.Cog):
             zerobot_common.permissions.is_allowed("banlist", ctx.channel.id)
         ) : return
 
+        # edits waiting for the background writer are not on disk yet
+        await self.flush_memberlists()
         memberlist = memberlist_from_disk(
             zerobot_common.banned_members_filename
         )
@@ -1689,7 +2124,7 @@ class MemberlistCog(commands.Cog):
         self.highest_id += 1
         new_member.entry_id = self.highest_entry_id + 1
         self.highest_entry_id += 1
-        list_access["current_members"].append(new_member)
+        memberlist_add(list_access["current_members"], new_member)
 
         # finished with updating, can release lock
         await self.unlock()
@@ -1808,6 +2243,38 @@ class MemberlistCog(commands.Cog):
         )
         await ctx.send(res)
     
+    async def archived_members(self, date):
+        """
+        The current members as they were after the daily update on date.
+        Uses the memberlist backup of that day from the archive or its file,
+        or rebuilds the list from the memberlist event log if there is none. Empty list if neither has it.
+        """
+        date_str = date.strftime(utilities.dateformat)
+        if self.archive is not None:
+            lines = await self.bot.loop.run_in_executor(
+                None, self.archive.load, "current_membs", date_str
+            )
+            if lines is not None:
+                return memberlist_from_string("\n".join(lines))
+        filename = (
+            "memberlists/current_members/current_membs_" + date_str + ".txt"
+        )
+        if os.path.exists(filename):
+            mlist = memberlist_from_disk(filename)
+            if len(mlist) > 0:
+                return mlist
+        if self.event_log is None:
+            return []
+        # state at the end of that day
+        day_end = datetime.strptime(date_str, utilities.dateformat)
+        day_end += timedelta(days=1)
+        lists = await self.bot.loop.run_in_executor(
+            None, self.event_log.state_at, day_end
+        )
+        if lists is None:
+            return []
+        return lists.get("current_members", [])
+
     @commands.command()
     async def clanstats(self, ctx, *args):
         """
@@ -1868,23 +2335,22 @@ class MemberlistCog(commands.Cog):
                 )
                 return
         date_string_1 = date_1.strftime(utilities.dateformat)
-        base_memblist_name = "memberlists/current_members/current_membs_"
-        oldlist_filename = base_memblist_name + date_string_1 + ".txt"
         # load disk versions to guarantee safe comparison
-        oldlist = memberlist_from_disk(oldlist_filename)
+        oldlist = await self.archived_members(date_1)
         if len(oldlist) == 0:
             await ctx.send(f"No archived memberlist found for {date_string_1}")
             return
         if len(args) == 2:
             date_string_2 = date_2.strftime(utilities.dateformat)
-            newlist_filename = base_memblist_name + date_string_2 + ".txt"
-            newlist = memberlist_from_disk(newlist_filename)
+            newlist = await self.archived_members(date_2)
             if len(newlist) == 0:
                 await ctx.send(
                     f"No archived memberlist found for {date_string_2}"
                 )
                 return
         else:
+            # edits waiting for the background writer are not on disk yet
+            await self.flush_memberlists()
             newlist = memberlist_from_disk("memberlists/current_members.txt")
         if len(args) == 2:
             stat_range = f"between {date_string_1} and {date_string_2}"
@@ -1898,36 +2364,29 @@ class MemberlistCog(commands.Cog):
         membs_on_discord = len(clan_member_role.members)
         total_on_disc = zerobot_common.guild.member_count
 
-        memberlist.memberlist_sort(stats, memberlist.hosts_cond, asc=False)
+        table = MemberTable(stats)
         top10hosts = "**Most active hosts:**\n"
-        for i in range(0,10):
-            total = 0
-            for x in stats[i].notify_stats.values():
-                total += x
-            top10hosts += f"{stats[i].name} : {total}\n"
+        hosts = table.hosts()
+        for i in table.top(hosts):
+            top10hosts += f"{table.name[i]} : {hosts[i]}\n"
 
-
-        memberlist.memberlist_sort(stats, memberlist.clan_xp_cond, asc=False)
         top10xp = "**Most xp gained:**\n"
-        for i in range(0,10):
-            top10xp += f"{stats[i].name} : {stats[i].clan_xp}\n"
+        for i in table.top(table.clan_xp):
+            top10xp += f"{table.name[i]} : {table.clan_xp[i]}\n"
         
-        memberlist.memberlist_sort(stats, memberlist.clues_cond, asc=False)
         top10clues = f"**Most clues done {stat_range}:**\n"
-        for i in range(0,10):
-            top10clues += f"{stats[i].name} : {stats[i].total_clues()}\n"
+        clues = table.total_clues()
+        for i in table.top(clues):
+            top10clues += f"{table.name[i]} : {clues[i]}\n"
         
-        memberlist.memberlist_sort(stats, memberlist.runescore_cond, asc=False)
         top10runescore = f"**Most runescore gained:**\n"
-        for i in range(0,10):
-            top10runescore += (
-                f"{stats[i].name} : {stats[i].activities['runescore'][1]}\n"
-            )
+        runescore = table.activity("runescore")
+        for i in table.top(runescore):
+            top10runescore += f"{table.name[i]} : {runescore[i]}\n"
         
-        memberlist.memberlist_sort(stats, memberlist.wildykills_cond, asc=False)
         top10pks = f"**Most Wildy PKs:**\n"
-        for i in range(0,10):
-            top10pks += f"{stats[i].name} : {stats[i].kills}\n"
+        for i in table.top(table.kills):
+            top10pks += f"{table.name[i]} : {table.kills[i]}\n"
 
         #TODO inactives between dates, so can do between and not just since
         days_diff = (today_date - date_1).days
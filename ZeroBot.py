@@ -13,6 +13,7 @@ from discord import Interaction
 from datetime import datetime
 from utilities import timeformat
 import asyncio
+import signal
 # required, might appear unused in editor as they are added based on settings. 
 from MemberlistCog import MemberlistCog
 from ApplicationsCog import ApplicationsCog
@@ -190,5 +191,10 @@ async def on_connect():
 async def on_resumed():
     zerobot_common.logfile.log(f"Bot session resumed.")
 
-# actually start the bot
-bot.run(zerobot_common.auth_token)
\ No newline at end of file
+# actually start the bot, only when run as main program. The daily update 
+# worker process imports this file again and should not start a second bot.
+if __name__ == "__main__":
+    # service stop sends SIGTERM, shut down the same way as for ctrl+c so the
+    # cogs get to write what they still have in memory.
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    bot.run(zerobot_common.auth_token)
\ No newline at end of file
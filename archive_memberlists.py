@@ -0,0 +1,49 @@
+# Moves the existing daily memberlist backups into the memberlist archive, run
+# from the bot folder while the bot is not running:
+#   python archive_memberlists.py            adds the backups to the archive
+#   python archive_memberlists.py --remove   also removes the backup files
+# Only removes files when the archive gives back exactly the same members.
+# Backups from before the last day already in the archive can't be added.
+import sys
+import traceback
+from memberlist import memberlist_from_disk
+from memberlist_archive import (
+    MemberlistArchive,
+    archive_kinds,
+    backup_dates,
+    backup_filename,
+    remove_archived_backups
+)
+
+def archive_all(archive, remove):
+    for kind in archive_kinds:
+        archived = archive.dates(kind)
+        last = archived[-1] if len(archived) > 0 else ""
+        for date_str in backup_dates(kind):
+            if date_str in archived:
+                continue
+            if date_str < last:
+                print(f"skipped {kind} {date_str}, before archived {last}")
+                continue
+            filename = backup_filename(kind, date_str)
+            try:
+                mlist = memberlist_from_disk(filename)
+                archive.store(
+                    kind, date_str, [memb.to_string() for memb in mlist]
+                )
+                print(f"archived {filename} ({len(mlist)} members)")
+            except Exception:
+                print(f"unable to archive {filename}")
+                print(traceback.format_exc())
+        if remove:
+            # far future date, includes all of them
+            removed = remove_archived_backups(archive, kind, "9999")
+            print(f"removed {removed} archived {kind} backup files")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 or sys.argv[1:] not in ([], ["--remove"]):
+        print("usage: python archive_memberlists.py [--remove]")
+        sys.exit(1)
+    archive_all(
+        MemberlistArchive("memberlists/archive/"), "--remove" in sys.argv
+    )
@@ -0,0 +1,111 @@
+"""
+Benchmarks get_ingame_memberlist against the fake rs api for clans of
+different sizes. Reports wall time, requests per second and retries.
+
+Runs from the bot folder, without a settings file:
+    python -m benchmarks.clantrack_fetch --sizes 500 2000 20000
+
+Disables the ingame data caches while running so every member is fetched.
+Fetch journals, hiscore cache entries and the fetch log go in a temporary
+folder, the bot's own memberlist and log folders are left alone.
+"""
+import argparse
+import shutil
+import tempfile
+import time
+import clantrack
+from benchmarks.fake_rs_api import FakeRsApi
+from hiscore_cache import HiscoreCache
+from logfile import LogFile
+
+def run(size, args):
+    """
+    Runs one fetch of a fake clan of size members, returns a result row.
+    """
+    api = FakeRsApi(
+        members=size,
+        latency=(args.min_latency, args.max_latency),
+        error_rate=args.error_rate,
+        not_found_rate=args.not_found_rate
+    )
+    base_url = api.start()
+    clantrack._memberlist_base_url = (
+        base_url + "m=clan-hiscores/members_lite.ws?clanName="
+    )
+    clantrack._member_base_url = base_url + "m=hiscore/index_lite.ws?player="
+    # fetch everyone, no leftovers from previous runs
+    clantrack.discard_ingame_journals()
+    scheduler = clantrack.RequestScheduler(
+        rate=args.rate,
+        burst=args.rate,
+        max_attempts=clantrack.settings["rs_api_max_attempts"],
+        retry_budget=max(clantrack.settings["rs_api_retry_budget"], size // 2)
+    )
+    start = time.perf_counter()
+    members = clantrack.get_ingame_memberlist(0, 0, scheduler=scheduler)
+    wall_time = time.perf_counter() - start
+    api.stop()
+    clantrack.discard_ingame_journals()
+
+    expected = size - len(api.not_found)
+    fetched = sum(1 for memb in members if memb.on_hiscores)
+    return [
+        size,
+        len(members),
+        f"{wall_time:.1f}",
+        f"{api.requests / wall_time:.1f}",
+        scheduler.retries,
+        api.errors,
+        expected - fetched
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[500, 2000, 5000, 20000]
+    )
+    parser.add_argument("--workers", type=int, default=None,
+        help="fetch threads, defaults to clantrack's ingame_fetch_workers")
+    parser.add_argument("--rate", type=float, default=200,
+        help="requests per second allowed by the scheduler")
+    parser.add_argument("--min-latency", type=float, default=0.05)
+    parser.add_argument("--max-latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--not-found-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    # keep the journals of a running bot in the same folder intact
+    work_folder = tempfile.mkdtemp(prefix="clantrack_fetch_")
+    clantrack.ingame_journal_folder = work_folder + "/"
+    clantrack.hiscore_cache = HiscoreCache(
+        work_folder + "/hiscore_cache/", 0, 0
+    )
+    clantrack.clantrack_log = LogFile(work_folder + "/clantrack")
+
+    clantrack.configure({
+        # the fake rs api ignores the clan name
+        "rs_api_clan_name": "benchmark",
+        "rs_api_max_attempts": 5,
+        "rs_api_retry_budget": 250,
+        "use_cached_ingame_data": False,
+        "hiscore_cache_enabled": False
+    })
+    if args.workers is not None:
+        clantrack.configure({"ingame_fetch_workers": args.workers})
+
+    rows = []
+    try:
+        for size in args.sizes:
+            rows.append(run(size, args))
+    finally:
+        shutil.rmtree(work_folder, ignore_errors=True)
+    header = [
+        "members", "retrieved", "wall s", "req/s", "retries", "api errors",
+        "missing"
+    ]
+    print("\n" + " | ".join(f"{h:>10}" for h in header))
+    for row in rows:
+        print(" | ".join(f"{str(x):>10}" for x in row))
+
+if __name__ == "__main__":
+    main()
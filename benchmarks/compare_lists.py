@@ -0,0 +1,140 @@
+"""
+Benchmarks the memberlist comparisons on synthetic memberlists of different
+sizes: clantrack.compare_lists, the rename matching step on its own and
+memberlist_compare_stats. Reports wall time, peak memory and how many of the
+renames were found correctly.
+
+Runs from the bot folder, without a settings file:
+    python -m benchmarks.compare_lists --sizes 500 5000 100000
+
+Peak memory is measured with tracemalloc in a separate run, because tracing
+slows down the timed run a lot.
+"""
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+import clantrack
+from memberlist import memberlist_compare_stats
+from benchmarks.memberlist_generator import generate_day
+
+def measure(func, *args, memory=True):
+    """
+    Runs func(*args), returns (result, seconds, peak MB). Output of func is
+    dropped, the comparisons log every leaving member.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - start
+        peak = None
+        if memory:
+            tracemalloc.start()
+            func(*args)
+            peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+            tracemalloc.stop()
+    return result, seconds, peak
+
+def rename_step(ingame_members, current_members):
+    """
+    Just the rename matching part of compare_lists, on the members that are
+    missing from the other list.
+    """
+    ingame_names = {m.name.lower() for m in ingame_members}
+    current_names = {m.name.lower() for m in current_members}
+    leaving = [m for m in current_members if m.name.lower() not in ingame_names]
+    joining = [
+        clantrack._updatable_copy(m) for m in ingame_members
+        if m.name.lower() not in current_names
+    ]
+    renames = clantrack._match_renames(leaving, joining)
+    claimed_ids = {join.entry_id for _, join, _ in renames}
+    renames += clantrack._match_renames_clan_data(
+        [m for m in leaving if m.activities["runescore"][1] == 0],
+        [m for m in joining if m.entry_id not in claimed_ids]
+    )
+    return renames
+
+def accuracy(renamed_members, truth):
+    """
+    Returns (correct, wrong) renames, compared to what really happened.
+    """
+    correct = 0
+    for memb in renamed_members:
+        if truth.renames.get(memb.old_names[-1]) == memb.name:
+            correct += 1
+    return correct, len(renamed_members) - correct
+
+def fmt(seconds, peak):
+    if seconds is None:
+        return "-"
+    if peak is None:
+        return f"{seconds:.2f}s"
+    return f"{seconds:.2f}s {peak:.0f}MB"
+
+def run(size, args):
+    """
+    Runs the comparisons for one generated clan of size members, returns a
+    result row.
+    """
+    current, ingame, truth = generate_day(
+        size,
+        join_rate=args.join_rate,
+        leave_rate=args.leave_rate,
+        rename_rate=args.rename_rate,
+        hidden_rate=args.hidden_rate,
+        seed=args.seed
+    )
+    memory = not args.no_memory
+    comp_res, cmp_s, cmp_mb = measure(
+        clantrack.compare_lists, ingame, current, memory=memory
+    )
+    _, ren_s, ren_mb = measure(rename_step, ingame, current, memory=memory)
+    stats_s = stats_mb = None
+    if size <= args.max_stats_size:
+        new_list = comp_res.staying + comp_res.joining + comp_res.renamed
+        _, stats_s, stats_mb = measure(
+            memberlist_compare_stats, new_list, current, memory=memory
+        )
+    correct, wrong = accuracy(comp_res.renamed, truth)
+    return [
+        size,
+        fmt(cmp_s, cmp_mb),
+        fmt(ren_s, ren_mb),
+        fmt(stats_s, stats_mb),
+        len(truth.renames),
+        correct,
+        wrong
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[500, 2000, 10000, 100000]
+    )
+    parser.add_argument("--join-rate", type=float, default=0.03)
+    parser.add_argument("--leave-rate", type=float, default=0.03)
+    parser.add_argument("--rename-rate", type=float, default=0.01)
+    parser.add_argument("--hidden-rate", type=float, default=0.05,
+        help="fraction of members that are not on the hiscores")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-stats-size", type=int, default=5000,
+        help="skip memberlist_compare_stats above this size, it is slow")
+    parser.add_argument("--no-memory", action="store_true",
+        help="skip the tracemalloc runs for peak memory")
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        rows.append(run(size, args))
+    header = [
+        "members", "compare", "renames", "cmp stats", "renamed",
+        "correct", "wrong"
+    ]
+    print("\n" + " | ".join(f"{h:>14}" for h in header))
+    for row in rows:
+        print(" | ".join(f"{str(x):>14}" for x in row))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+A local stand-in for the rs api, serves the members_lite.ws clan memberlist
+and index_lite.ws player hiscores in the same format as jagex does. Used to
+test and benchmark clantrack without sending requests to the real api.
+
+Can be run on its own to try clantrack against it by hand:
+    python -m benchmarks.fake_rs_api --members 500 --port 8080
+"""
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# number of hiscore lines jagex returns for skills and activities
+_skill_lines = 29
+_activity_lines = 30
+_ranks = [
+    "Owner", "Deputy Owner", "Overseer", "Coordinator", "Organiser",
+    "Admin", "General", "Captain", "Lieutenant", "Sergeant", "Corporal",
+    "Recruit"
+]
+
+class FakeRsApi:
+    """
+    FakeRsApi(members, latency, error_rate, not_found_rate, seed).
+
+    members - number of members in the fake clan.
+    latency - (min, max) seconds of delay added to every response.
+    error_rate - fraction of hiscore requests answered with a 429 or 503.
+    not_found_rate - fraction of members that are not on the hiscores (404).
+    Member names contain spaces, which are sent as non breaking spaces in the
+    clan memberlist like jagex does.
+    """
+    def __init__(
+        self,
+        members=500,
+        latency=(0.05, 0.2),
+        error_rate=0.02,
+        not_found_rate=0.05,
+        seed=0
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.members = dict()
+        self.not_found = set()
+        for i in range(members):
+            name = f"Zb Mem {i}" if i < 1000 else f"Zb {i}"
+            self.members[name.lower()] = (
+                name,
+                self.random.choice(_ranks),
+                self.random.randint(0, 500000000),
+                self.random.randint(0, 1000)
+            )
+            if self.random.random() < not_found_rate:
+                self.not_found.add(name.lower())
+        self._server = None
+    def clan_list(self):
+        lines = ["Clanmate, Clan Rank, Total XP, Kills"]
+        for name, rank, clan_xp, kills in self.members.values():
+            lines.append(f"{name.replace(' ', chr(160))},{rank},{clan_xp},{kills}")
+        return "\n".join(lines)
+    def hiscores(self, name):
+        # same member always gets the same stats
+        rand = random.Random(name)
+        lines = []
+        for _ in range(_skill_lines):
+            lines.append(
+                f"{rand.randint(1, 2000000)},{rand.randint(1, 120)},"
+                f"{rand.randint(0, 200000000)}"
+            )
+        for _ in range(_activity_lines):
+            lines.append(f"{rand.choice([-1, rand.randint(1, 500000)])},"
+                f"{rand.choice([-1, rand.randint(0, 5000)])}")
+        return "\n".join(lines)
+    def _respond(self, path, query):
+        """
+        Returns (status, body) for a request.
+        """
+        with self._lock:
+            self.requests += 1
+            delay = self.random.uniform(*self.latency)
+            error = self.random.random() < self.error_rate
+        time.sleep(delay)
+        if path.endswith("members_lite.ws"):
+            return (200, self.clan_list())
+        if path.endswith("index_lite.ws"):
+            if error:
+                with self._lock:
+                    self.errors += 1
+                return (self.random.choice([429, 503]), "")
+            name = query.get("player", [""])[0].replace(chr(160), " ").lower()
+            if not name in self.members or name in self.not_found:
+                return (404, "")
+            return (200, self.hiscores(name))
+        return (404, "")
+    def start(self, port=0):
+        """
+        Starts serving in a background thread, returns the base url.
+        """
+        api = self
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+            def do_GET(self):
+                url = urlparse(self.path)
+                status, body = api._respond(url.path, parse_qs(url.query))
+                data = body.encode("iso-8859-1")
+                self.send_response(status)
+                self.send_header(
+                    "Content-Type", "text/plain; charset=ISO-8859-1"
+                )
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_port}/"
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake rs api server.")
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--not-found-rate", type=float, default=0.05)
+    args = parser.parse_args()
+    api = FakeRsApi(
+        members=args.members,
+        error_rate=args.error_rate,
+        not_found_rate=args.not_found_rate
+    )
+    print(f"Serving fake rs api at {api.start(args.port)}, ctrl+c to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        api.stop()
@@ -0,0 +1,132 @@
+"""
+Generates synthetic memberlists with the real Member structure, for
+benchmarks of the memberlist comparisons.
+
+generate_day makes a current memberlist and the ingame memberlist of the
+next day, with a known set of members that joined, left and renamed.
+"""
+import random
+from member import Member, skill_labels
+from clantrack import _rename_clue_labels
+
+ingame_ranks = [
+    "Recruit", "Corporal", "Sergeant", "Lieutenant", "Captain", "General",
+    "Admin", "Organiser", "Coordinator", "Overseer", "Deputy Owner", "Owner"
+]
+
+class Truth:
+    """
+    What really happened between the generated lists.
+
+    renames - old name -> new name of members that renamed.
+    leaving - names of current members that left the clan.
+    joining - names of ingame members that are new to the clan.
+    """
+    def __init__(self):
+        self.renames = dict()
+        self.leaving = set()
+        self.joining = set()
+
+def random_member(rng, name, on_hiscores=True):
+    """
+    Makes a member with random but plausible clan and hiscore stats.
+    """
+    memb = Member(
+        name,
+        rng.choice(ingame_ranks[:6]),
+        rng.randint(0, 2000000000),
+        rng.randint(0, 5000)
+    )
+    memb.join_date = "2020-01-01"
+    if rng.random() < 0.8:
+        memb.discord_id = rng.randint(10**17, 10**18)
+    memb.on_hiscores = on_hiscores
+    if not on_hiscores:
+        return memb
+    total = 0
+    for label in skill_labels[1:]:
+        xp = rng.randint(0, 200000000)
+        memb.skills[label] = [rng.randint(1, 2000000), xp, 99]
+        total += xp
+    memb.skills["overall"] = [rng.randint(1, 2000000), total, 2898]
+    memb.activities["runescore"] = [rng.randint(1, 500000), rng.randint(1, 50000)]
+    for label in _rename_clue_labels:
+        memb.activities[label] = [rng.randint(1, 500000), rng.randint(0, 3000)]
+    return memb
+
+def next_day(rng, memb, name, entry_id):
+    """
+    Returns the member as it would be fetched ingame a day later, with some
+    random gains. A fresh object with a new entry id, like clantrack makes.
+    """
+    new_memb = Member(name, memb.rank, memb.clan_xp, memb.kills)
+    new_memb.id = entry_id
+    new_memb.entry_id = entry_id
+    new_memb.on_hiscores = memb.on_hiscores
+    if rng.random() < 0.5:
+        # active today
+        new_memb.clan_xp += rng.randint(0, 5000000)
+        new_memb.kills += rng.randint(0, 20)
+    for label, stats in memb.skills.items():
+        new_memb.skills[label] = list(stats)
+    for label, stats in memb.activities.items():
+        new_memb.activities[label] = list(stats)
+    if memb.on_hiscores and rng.random() < 0.5:
+        gains = 0
+        for label in rng.sample(skill_labels[1:], 3):
+            gain = rng.randint(0, 1000000)
+            new_memb.skills[label][1] += gain
+            gains += gain
+        new_memb.skills["overall"][1] += gains
+        new_memb.activities["runescore"][1] += rng.randint(0, 100)
+    return new_memb
+
+def generate_day(
+    size,
+    join_rate=0.03,
+    leave_rate=0.03,
+    rename_rate=0.01,
+    hidden_rate=0.05,
+    seed=0
+):
+    """
+    Returns (current_members, ingame_members, truth) for a clan of size
+    members. Rates are fractions of size, hidden_rate is the fraction of
+    members that are not on the hiscores.
+    """
+    rng = random.Random(seed)
+    current_members = list()
+    for i in range(size):
+        memb = random_member(
+            rng, f"Zb Mem {i}", on_hiscores=rng.random() >= hidden_rate
+        )
+        memb.id = i + 1
+        memb.entry_id = i + 1
+        current_members.append(memb)
+
+    truth = Truth()
+    ingame_members = list()
+    entry_id = size + 1
+    for memb in current_members:
+        r = rng.random()
+        if r < leave_rate:
+            truth.leaving.add(memb.name)
+            continue
+        name = memb.name
+        if r < leave_rate + rename_rate:
+            name = f"Zb Ren {memb.id}"
+            truth.renames[memb.name] = name
+        ingame_members.append(next_day(rng, memb, name, entry_id))
+        entry_id += 1
+    for i in range(int(size * join_rate)):
+        name = f"Zb New {i}"
+        memb = random_member(
+            rng, name, on_hiscores=rng.random() >= hidden_rate
+        )
+        memb.id = entry_id
+        memb.entry_id = entry_id
+        entry_id += 1
+        truth.joining.add(name)
+        ingame_members.append(memb)
+    rng.shuffle(ingame_members)
+    return current_members, ingame_members, truth
@@ -0,0 +1,137 @@
+"""
+Benchmarks reading memberlist files, memberlist_from_string against the old
+way of parsing a member line with ast.literal_eval and strptime, and the
+binary format. Also checks that all of them give the same members.
+
+Runs from the bot folder, without a settings file:
+    python -m benchmarks.memberlist_parse --sizes 500 5000 50000
+"""
+import argparse
+import ast
+import random
+import time
+from datetime import datetime, timedelta
+import utilities
+from member import (
+    Member,
+    Warning,
+    skill_labels,
+    activity_labels,
+    notify_role_names,
+    misc_labels
+)
+from memberlist import memberlist_from_string, memberlist_to_string
+from memberlist_binary import memberlist_to_bytes, memberlist_from_bytes
+from utilities import int_0, bracket_parser
+from benchmarks.memberlist_generator import generate_day
+
+def literal_eval_parse(member_str):
+    """
+    Member.from_string as it was before the dedicated parser, for comparison.
+    """
+    memb_info = member_str.split("\t")
+    memb = Member(
+        memb_info[0], memb_info[1], int_0(memb_info[21]), int_0(memb_info[22])
+    )
+    memb.discord_rank = memb_info[2]
+    memb.site_rank = memb_info[3]
+    memb.join_date = memb_info[4]
+    memb.passed_gem = (memb_info[5] == "TRUE")
+    memb.profile_link = memb_info[6]
+    memb.leave_date = memb_info[7]
+    memb.leave_reason = memb_info[8]
+    memb.referral = memb_info[9]
+    memb.discord_id = int_0(memb_info[10])
+    memb.discord_name = memb_info[11]
+    if (len(memb_info[12]) == 0) :
+        memb.old_names = list()
+    else :
+        memb.old_names = memb_info[12].split(',')
+    try:
+        memb.last_active = datetime.strptime(
+            memb_info[13], utilities.dateformat
+        )
+    except ValueError:
+        memb.last_active = None
+    memb.id = int_0(memb_info[14])
+    memb.entry_id = int_0(memb_info[15])
+    memb.warning_points = int_0(memb_info[16])
+    warnings = bracket_parser(memb_info[17])
+    for w in warnings:
+        memb.warnings.append(Warning.from_str(w))
+    memb.note1 = memb_info[18]
+    memb.note2 = memb_info[19]
+    memb.note3 = memb_info[20]
+    for num,x in enumerate(ast.literal_eval(memb_info[23])):
+        memb.skills[skill_labels[num]] = x
+    for num,x in enumerate(ast.literal_eval(memb_info[24])):
+        memb.activities[activity_labels[num]] = x
+    for num,x in enumerate(ast.literal_eval(memb_info[25])):
+        memb.notify_stats[notify_role_names[num]] = x
+    for i in range(len(misc_labels)):
+        memb.misc[misc_labels[i]] = memb_info[i+26]
+    memb.misc["discord_roles"] = ast.literal_eval(memb.misc["discord_roles"])
+    memb.misc["events_started"] = int_0(memb.misc["events_started"])
+    return memb
+
+def memberlist_text(size, seed=0):
+    """
+    Memberlist file contents for a generated clan of size members, with
+    last active dates, discord roles and notify stats filled in.
+    """
+    members, _, _ = generate_day(size, seed=seed)
+    rng = random.Random(seed)
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    for memb in members:
+        memb.last_active = today - timedelta(days=rng.randint(0, 300))
+        memb.misc["discord_roles"] = rng.sample(notify_role_names, 3)
+        for role in rng.sample(notify_role_names, 2):
+            memb.notify_stats[role] = rng.randint(0, 50)
+        if rng.random() < 0.1:
+            memb.old_names = ["Zb Old " + str(memb.id)]
+    return memberlist_to_string(members)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[500, 5000, 50000]
+    )
+    args = parser.parse_args()
+
+    header = [
+        "members", "text MB", "old s", "new s", "speedup", "binary MB",
+        "binary s"
+    ]
+    rows = []
+    for size in args.sizes:
+        text = memberlist_text(size)
+        start = time.perf_counter()
+        old = [literal_eval_parse(line) for line in text.splitlines()]
+        old_s = time.perf_counter() - start
+        start = time.perf_counter()
+        new = memberlist_from_string(text)
+        new_s = time.perf_counter() - start
+        data = memberlist_to_bytes(new)
+        start = time.perf_counter()
+        binary = memberlist_from_bytes(data)
+        binary_s = time.perf_counter() - start
+        old_lines = [str(m) for m in old]
+        if old_lines != [str(m) for m in new]:
+            raise Exception(f"Parsers disagree for {size} members")
+        if old_lines != [str(m) for m in binary]:
+            raise Exception(f"Binary format differs for {size} members")
+        rows.append([
+            size,
+            f"{len(text.encode('utf-8')) / 1024 / 1024:.1f}",
+            f"{old_s:.2f}",
+            f"{new_s:.2f}",
+            f"{old_s / new_s:.1f}x",
+            f"{len(data) / 1024 / 1024:.1f}",
+            f"{binary_s:.2f}"
+        ])
+    print("\n" + " | ".join(f"{h:>10}" for h in header))
+    for row in rows:
+        print(" | ".join(f"{str(x):>10}" for x in row))
+
+if __name__ == "__main__":
+    main()
@@ -7,17 +7,24 @@ Is able to very accurately identify new names for people in clan that renamed.
 Does so by comparing ingame memberlist changes and individual member stats.
 """
 import os
-import zerobot_common
 import utilities
 from utilities import int_0
 from logfile import LogFile
 from member import Member, skill_labels, activity_labels
 from memberlist import CompareResult, memberlist_from_disk
-from exceptions import NotAMember, NotAMemberList
+from exceptions import NotAMember, NotAMemberList, ClanListError
+from request_scheduler import RequestScheduler
+from hiscore_cache import HiscoreCache
 # external imports
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import threading
 import copy
+from bisect import bisect_left, bisect_right
+from collections import Counter
+import numpy
+from scipy.optimize import linear_sum_assignment
 
 # links to jagex API
 _memberlist_base_url = (
@@ -32,17 +39,84 @@ _member_base_url = (
 # logfile for clantrack
 clantrack_log = LogFile("logs/clantrack")
 
+# settings used by clantrack, set from the settings file by zerobot_common
+# with configure(). Kept here instead of read from zerobot_common, so the
+# update worker process can run clantrack without loading the whole bot.
+settings = {
+    "rs_api_clan_name": None,
+    "use_cached_ingame_data": True,
+    "ingame_fetch_workers": 10,
+    "rs_api_requests_per_second": 10,
+    "rs_api_max_attempts": 5,
+    "rs_api_retry_budget": 250,
+    "hiscore_cache_enabled": True,
+    "hiscore_cache_ttl_hours": 12,
+    "hiscore_cache_negative_ttl_hours": 72
+}
+
+# hiscore responses of individual players, reused until they expire.
+hiscore_cache = HiscoreCache(
+    "memberlists/hiscore_cache/",
+    settings["hiscore_cache_ttl_hours"] * 3600,
+    settings["hiscore_cache_negative_ttl_hours"] * 3600
+)
+
+def configure(new_settings):
+    """
+    Updates the clantrack settings from a dictionary with some or all of the
+    keys of settings.
+    """
+    settings.update(new_settings)
+    hiscore_cache.ttl = settings["hiscore_cache_ttl_hours"] * 3600
+    hiscore_cache.negative_ttl = (
+        settings["hiscore_cache_negative_ttl_hours"] * 3600
+    )
+
+# folder of the fetch journals, see IngameJournal.
+ingame_journal_folder = "memberlists/current_members/"
+
+# requests sessions are not guaranteed to be thread safe, each fetch thread
+# keeps its own session to re-use connections to the rs api.
+_thread_data = threading.local()
+
+def _thread_session():
+    """
+    Returns the requests session of the current thread, creates it if needed.
+    """
+    session = getattr(_thread_data, "session", None)
+    if session is None:
+        session = requests.session()
+        _thread_data.session = session
+    return session
+
+def _updatable_copy(memb):
+    """
+    Cheap copy of a member to load updates into. Only the stat dicts are 
+    filled in place by the updates, the rest are replaced as a whole, so they
+    can stay shared with the original member.
+    """
+    new_memb = copy.copy(memb)
+    new_memb.skills = memb.skills.copy()
+    new_memb.activities = memb.activities.copy()
+    new_memb.misc = dict(memb.misc)
+    new_memb.notify_stats = memb.notify_stats.copy()
+    return new_memb
+
 def compare_lists(ingame_members, current_members):
     """
     Makes no changes to the lists, just returns an accuracte comparison.
     The comparison result is split in staying, joining, renamed and leaving 
     member lists. All members in them are updated with most recent stats.
+    Leaving members are the member objects from current_members.
 
     The new memberlist can be constructed as staying + joining + renamed.
     """
     clantrack_log.log(f"Comparing memberlist in memory with ingame one...")
-    ingame_membs = copy.deepcopy(ingame_members)
-    current_membs = copy.deepcopy(current_members)
+    now = datetime.utcnow()
+    # names are case insensitive, index both lists by lowercase name. If a
+    # name occurs twice the last one is used, same as a search would.
+    current_by_name = {cm.name.lower(): cm for cm in current_members}
+    ingame_names = {im.name.lower() for im in ingame_members}
     # create lists to compare members
     staying_members = list()
     joining_members = list()
@@ -50,17 +124,13 @@ def compare_lists(ingame_members, current_members):
     renamed_members = list()
     ## PART 1: find possible joining members, load new data if stayed in clan
     # loop through ingame members list, try to find in current members list
-    for ingame_memb in ingame_membs:
-        existing_member = None
-        for cm in current_membs:
-            if cm.name.lower() == ingame_memb.name.lower():
-                existing_member = cm
+    for ingame_memb in ingame_members:
+        ingame_memb = _updatable_copy(ingame_memb)
+        existing_member = current_by_name.get(ingame_memb.name.lower())
         if existing_member is None:
             # not found = new ingame member or someone renamed to this
-            ingame_memb.join_date = datetime.utcnow().strftime(
-                utilities.dateformat
-            )
-            ingame_memb.last_active = datetime.utcnow()
+            ingame_memb.join_date = now.strftime(utilities.dateformat)
+            ingame_memb.last_active = now
             joining_members.append(ingame_memb)
         else:
             # found = just joined today or stayed in clan
@@ -80,11 +150,11 @@ def compare_lists(ingame_members, current_members):
             # if last active is not set in future...
             if (
                 ingame_memb.last_active == None 
-                or ingame_memb.last_active < datetime.utcnow()
+                or ingame_memb.last_active < now
             ):
                 # and they have been active, update last_active to today
                 if (existing_member.wasActive(ingame_memb)):
-                    ingame_memb.last_active = datetime.utcnow()
+                    ingame_memb.last_active = now
             # if they just joined, assign them as joining.
             if (just_joined):
                 joining_members.append(ingame_memb)
@@ -94,109 +164,47 @@ def compare_lists(ingame_members, current_members):
 
     ## PART 2: find possible leaving members
     # loop through current members list, try to find in ingame members list
-    for current_memb in current_membs:
-        found = False
-        for im in ingame_membs:
-            if im.name.lower() == current_memb.name.lower(): found = True
-        if not(found):
+    for current_memb in current_members:
+        if current_memb.name.lower() not in ingame_names:
             # member left or renamed to one in joining
             leaving_members.append(current_memb)
         # found = stayed in clan, already handled by PART1 loop.
 
     ## PART 3: Compare leaving and joining to find renames
-    # lower than this is a decent chance of a match
-    chance_threshold = 2
-    for leave in leaving_members:
-        # this is a check on current member data, if there was no ingame data before then
-        # there is no information to use to find their new name.
-        #TODO: perhaps there might be some limited info to use, 
-        #    like (previous) name similarity / rank / comments / clan list stats.
-        #TODO: use not(.on_hiscores) after adding it to disk save part of member
-        if leave.activities["runescore"][1] == 0:
-            # already know nobody stayed in clan with the same name, they wouldnt
-            # be in leaving members if there was. No old data = cant find new name.
-            clantrack_log.log(
-                f"Current member marked as leaving has no stats data : {leave.name}. "
-                "Can not compare with new members for renames, removing from clan."
-            )
-            continue
-        # calculate match chances
-        best_match = 0
-        best_chance = 1000
-        non_matches = 0
-        for join in joining_members:
-            #TODO: use not(.on_hiscores) after making it stored on disk
-            if join.activities["runescore"][1] == 0:
-                # TODO: this case does have some data from clan list: name, rank, clanxp, kills
-                clantrack_log.log(
-                    f"Missing data for {join.name}. Can not check if this is"
-                    f" new name of {leave.name}, skipping this comparison option."
-                )
-                non_matches += 1
-                continue
-            chance = leave.match(join)
-            if (chance == -1):
-                non_matches += 1
-                continue
-            if (chance < best_chance):
-                best_chance = chance
-                best_match = join
-            else :
-                non_matches += 1
-        
-        if non_matches == len(joining_members):
-            # all joining are ruled out immediately by lower stats or no data,
-            # they stay assigned as leaving members.
-            clantrack_log.log(
-                f"{leave.name} left the clan, no possible match in joiners"
-            )
-        else:
-            msg = (
-                f"{leave.name} renamed to {best_match.name} "
-                f"with {best_chance} chance?"
-            )
-            if (best_chance < chance_threshold):
-                # good enough rename chance, should have updated stats and 
-                # and assigned to renamed.
-                clantrack_log.log(f"{msg} -- likely, considering as renamed")
-                # if new name was a previous name, remove from old names.
-                if best_match.name in leave.old_names:
-                    leave.old_names.remove(best_match.name)
-                # add previous name to old names
-                leave.old_names.append(leave.name)
-
-                # load all the old info into the new name object
-                best_match.loadFromOldName(leave)
-                # Member was active, they renamed. update last active with 
-                # today if it was not set in the future.
-                if (
-                    best_match.last_active == None 
-                    or best_match.last_active < datetime.utcnow()
-                ):
-                    best_match.last_active = datetime.utcnow()
-                
-                # Final step, mark as renamed. MUST also be removed from 
-                # leaving and joining, is done below, cant do while iterating.
-                renamed_members.append(best_match)
-            else:
-                # not a good enough rename chance, stays assigned as leaving
-                clantrack_log.log(f"{msg} -- unlikely, removing from clan")
+    # leaving and joining members that renamed by id(), to filter them out
+    # after. Not by entry id, _load_renamed gives the joiner the entry id of
+    # the leaving member and new joiners' ids can overlap existing ones.
+    renamed_leaves = set()
+    renamed_joins = set()
+    renames = _match_renames(leaving_members, joining_members)
+    # leaving members without hiscore data only have clan list data to go on
+    claimed = {id(join) for _, join, _ in renames}
+    renames += _match_renames_clan_data(
+        [m for m in leaving_members if m.activities["runescore"][1] == 0],
+        [m for m in joining_members if id(m) not in claimed]
+    )
+    for leave, join, chance in renames:
+        _load_renamed(join, leave, now)
+        # Final step, mark as renamed. MUST also be removed from 
+        # leaving and joining, is done below.
+        renamed_leaves.add(id(leave))
+        renamed_joins.add(id(join))
+        renamed_members.append(join)
     
     ## PART 4: sort out renamed and members who still needed invites in lists.
-    for memb in renamed_members:
-        # renamed = joining, with entry id set from leave so this should work
-        joining_members.remove(memb)
-        leaving_members.remove(memb)
-        continue
+    joining_members = [
+        m for m in joining_members if id(m) not in renamed_joins
+    ]
+    leaving = [m for m in leaving_members if id(m) not in renamed_leaves]
     
     # anyone with needs invite rank should be assigned as staying, not leaving
-    leaving = leaving_members.copy()
+    leaving_members = list()
     for memb in leaving:
         if (memb.rank == "needs invite"):
             clantrack_log.log(f"{memb.name} was not invited yet, kept on list.")
-            leaving_members.remove(memb)
             staying_members.append(memb)
             continue
+        leaving_members.append(memb)
     # joining members is already correct by now, no further changes needed
 
     clantrack_log.log(f"Finished comparing memberlists.")
@@ -204,68 +212,316 @@ def compare_lists(ingame_members, current_members):
         staying_members, joining_members, leaving_members, renamed_members
     )
 
-def _get_member_data(member, session=None, attempts=0):
+# stats that can never go down, a lower value rules out a rename.
+_rename_clue_labels = [
+    "easy_clues", "medium_clues", "hard_clues", "elite_clues", "master_clues"
+]
+# High end estimate of expected gains over a day, rename distance is measured
+# in these units. Same as Member.match.
+_rename_scales = {
+    "clan_xp": 20000000,
+    "runescore": 1000,
+    "overall": 20000000,
+    "constitution": 4000000
+}
+
+def _rename_stats(members):
+    """
+    Returns two matrices with a row per member, the stats that can't go down 
+    and the stats used for the rename distance (clan xp, runescore, total xp,
+    constitution xp).
+    """
+    mono = numpy.zeros(
+        (len(members), 3 + len(skill_labels) + len(_rename_clue_labels)),
+        dtype=numpy.int64
+    )
+    dist = numpy.zeros((len(members), 4), dtype=numpy.float64)
+    for i, memb in enumerate(members):
+        row = [memb.clan_xp, memb.kills, memb.total_clues()]
+        row += memb.skills.column(1).tolist()
+        row += [memb.activities[k][1] for k in _rename_clue_labels]
+        mono[i] = row
+        dist[i] = [
+            memb.clan_xp,
+            memb.activities["runescore"][1],
+            memb.skills["overall"][1],
+            memb.skills["constitution"][1]
+        ]
+    dist /= [
+        _rename_scales["clan_xp"],
+        _rename_scales["runescore"],
+        _rename_scales["overall"],
+        _rename_scales["constitution"]
+    ]
+    return mono, dist
+
+def _match_renames(leaving_members, joining_members):
+    """
+    Finds the joining members that are likely renames of leaving members.
+    Same measure as Member.match, but computed for all pairs at once and the
+    pairs are chosen together, so two leaving members can't both claim the
+    same joiner and a crowded day doesn't hand out the best joiners first 
+    come first serve.
+
+    Returns a list of (leave, join, chance) for the likely renames.
+    """
+    # lower than this is a decent chance of a match
+    chance_threshold = 2
+    # this is a check on current member data, if there was no ingame data 
+    # before then they are left for _match_renames_clan_data.
+    #TODO: use not(.on_hiscores) after adding it to disk save part of member
+    leavers = list()
+    for leave in leaving_members:
+        if leave.activities["runescore"][1] == 0:
+            continue
+        leavers.append(leave)
+    joiners = list()
+    for join in joining_members:
+        #TODO: use not(.on_hiscores) after making it stored on disk
+        if join.activities["runescore"][1] == 0:
+            # TODO: this case does have some data from clan list: name, rank, clanxp, kills
+            clantrack_log.log(
+                f"Missing data for {join.name}. Can not check if this is"
+                f" the new name of a leaving member, skipping."
+            )
+            continue
+        joiners.append(join)
+    if len(leavers) == 0:
+        return list()
+    if len(joiners) == 0:
+        for leave in leavers:
+            clantrack_log.log(
+                f"{leave.name} left the clan, no possible match in joiners"
+            )
+        return list()
+
+    leave_mono, leave_dist = _rename_stats(leavers)
+    join_mono, join_dist = _rename_stats(joiners)
+    # one stat column at a time, so only leavers x joiners sized arrays are
+    # made, not leavers x joiners x stats.
+    # possible[l, j] is False if joiner j has lower stats than leaver l
+    possible = numpy.ones((len(leavers), len(joiners)), dtype=bool)
+    for col in range(leave_mono.shape[1]):
+        possible &= (
+            join_mono[numpy.newaxis, :, col] >= leave_mono[:, col, numpy.newaxis]
+        )
+    chances = numpy.zeros((len(leavers), len(joiners)), dtype=numpy.float64)
+    for col in range(leave_dist.shape[1]):
+        diff = (
+            join_dist[numpy.newaxis, :, col] - leave_dist[:, col, numpy.newaxis]
+        )
+        chances += diff * diff
+    numpy.sqrt(chances, out=chances)
+
+    # pairs that are impossible or unlikely get a cost higher than any set of
+    # likely pairs can add up to, so the solver matches as many likely pairs
+    # as it can first, and then picks the closest ones.
+    likely = possible & (chances < chance_threshold)
+    unlikely_cost = chance_threshold * (min(len(leavers), len(joiners)) + 1)
+    cost = numpy.where(likely, chances, unlikely_cost)
+    rows, cols = linear_sum_assignment(cost)
+    assigned = {
+        row: col for row, col in zip(rows, cols) if likely[row, col]
+    }
+
+    renames = list()
+    for l, leave in enumerate(leavers):
+        if not possible[l].any():
+            # all joining are ruled out immediately by lower stats, they stay
+            # assigned as leaving members.
+            clantrack_log.log(
+                f"{leave.name} left the clan, no possible match in joiners"
+            )
+            continue
+        if l in assigned:
+            join = joiners[assigned[l]]
+            chance = float(chances[l, assigned[l]])
+            clantrack_log.log(
+                f"{leave.name} renamed to {join.name} with {chance} chance? "
+                "-- likely, considering as renamed"
+            )
+            renames.append((leave, join, chance))
+            continue
+        # not a good enough rename chance, stays assigned as leaving
+        best = numpy.where(possible[l], chances[l], numpy.inf).argmin()
+        clantrack_log.log(
+            f"{leave.name} renamed to {joiners[best].name} with "
+            f"{float(chances[l, best])} chance? -- unlikely, removing from clan"
+        )
+    return renames
+
+def _match_renames_clan_data(leaving_members, joining_members):
+    """
+    Cheap second tier of rename matching for leaving members that had no
+    hiscore data. Only the clan list data is known for them: rank, clan xp
+    and kills. A joiner is a candidate if they have the same rank, no fewer
+    kills and at most a day's worth of clan xp more.
+
+    Joiners are sorted by clan xp, so the candidates for each leaving member
+    are found with a range lookup instead of checking every joiner. A rename
+    is only accepted if there is exactly one candidate, and if that joiner is
+    not also the only candidate of another leaving member.
+
+    Returns a list of (leave, join, chance) for the likely renames.
+    """
+    clanxp_exp = _rename_scales["clan_xp"]
+    joiners = sorted(joining_members, key=lambda m: m.clan_xp)
+    joiners_xp = [m.clan_xp for m in joiners]
+    found = list()
+    for leave in leaving_members:
+        if leave.clan_xp == 0:
+            # no clan xp = nothing that tells them apart from other joiners.
+            clantrack_log.log(
+                f"Current member marked as leaving has no stats data : {leave.name}. "
+                "Can not compare with new members for renames, removing from clan."
+            )
+            continue
+        start = bisect_left(joiners_xp, leave.clan_xp)
+        end = bisect_right(joiners_xp, leave.clan_xp + clanxp_exp)
+        candidates = [
+            join for join in joiners[start:end]
+            if join.kills >= leave.kills and join.rank == leave.rank
+        ]
+        if len(candidates) != 1:
+            clantrack_log.log(
+                f"{leave.name} left the clan, has no hiscore data and "
+                f"{len(candidates)} possible matches by clan data in joiners"
+            )
+            continue
+        found.append((leave, candidates[0]))
+    # can't tell which one renamed if several only match the same joiner
+    claims = Counter(id(join) for _, join in found)
+    renames = list()
+    for leave, join in found:
+        chance = float(join.clan_xp - leave.clan_xp) / clanxp_exp
+        msg = (
+            f"{leave.name} renamed to {join.name} with {chance} chance "
+            "by clan data?"
+        )
+        if claims[id(join)] > 1:
+            clantrack_log.log(
+                f"{msg} -- also matches other leaving members, removing from clan"
+            )
+            continue
+        clantrack_log.log(f"{msg} -- likely, considering as renamed")
+        renames.append((leave, join, chance))
+    return renames
+
+def _load_renamed(new_memb, old_memb, now):
+    """
+    Loads the info of old_memb into new_memb, the member under their new name.
+    """
+    # previous name goes to old names, new name is no longer an old name. 
+    # Makes a new list, the old one still belongs to old_memb.
+    old_names = [x for x in old_memb.old_names if x != new_memb.name]
+    old_names.append(old_memb.name)
+
+    # load all the old info into the new name object
+    new_memb.loadFromOldName(old_memb)
+    new_memb.old_names = old_names
+    # Member was active, they renamed. update last active with 
+    # today if it was not set in the future.
+    if (
+        new_memb.last_active == None 
+        or new_memb.last_active < now
+    ):
+        new_memb.last_active = now
+
+def _get_member_data(member, scheduler, session=None, refresh=False):
+    """
+    Retrieves the hiscore stats of member through the request scheduler.
+    Members that could not be retrieved are added to the dead letters of the
+    scheduler, to try them again at the end.
+
+    Uses the hiscore cache if enabled, only fetches if the entry expired.
+    refresh - always fetch, for members known to have new stats. The fresh
+        response is still stored in the cache.
+
+    Returns True if finished for this member, False if added to dead letters.
+    """
     if not isinstance(member, Member):
         raise NotAMember("Object to fetch ingame data for is not of Member")
-    try:
-        if session is None:
-            req_resp = requests.get(_member_base_url+member.name, timeout=10)
-        else:
-            req_resp = session.get(_member_base_url+member.name, timeout=10)
-    except requests.exceptions.Timeout:
-        if attempts > 5:
-            clantrack_log.log(f"Failed to get member data : {member.name}")
-            return
-        return _get_member_data(member, session, attempts=attempts+1)
-    except Exception:
-        if attempts > 5:
-            clantrack_log.log(f"Failed to get member data : {member.name}")
-            return
-        return _get_member_data(member, session, attempts=attempts+1)
-
+    use_cache = settings["hiscore_cache_enabled"]
+    if use_cache and not refresh:
+        cached = hiscore_cache.get(member.name)
+        if cached is not None:
+            status, body = cached
+            if status == requests.codes["ok"]:
+                _load_member_data(member, body)
+            return True
+    if session is None:
+        session = _thread_session()
+    req_resp = scheduler.get(session, _member_base_url+member.name)
+    if req_resp is None:
+        scheduler.dead_letter(member)
+        return False
     if (req_resp.status_code == requests.codes["ok"]):
-        member_info = req_resp.text.splitlines()
-        for i in range(0, len(skill_labels)):
-            # skills: [rank,level,xp]
-            skills = member_info[i].split(",")
-            # re-order to match activities index, and replace -1's with 0
-            skill_array = [
-                int_0(skills[0]),
-                int_0(skills[2]),
-                int_0(skills[1])
-            ]
-            member.skills[skill_labels[i]] = skill_array
-        for i in range(0, len(activity_labels)):
-            # stat: [rank, score], starts after skills till end of activities
-            activivity_arr = member_info[len(skill_labels)+i].split(",")
-            activity = [
-                int_0(activivity_arr[0]), 
-                int_0(activivity_arr[1])
-            ]
-            member.activities[activity_labels[i]] = activity
-        member.on_hiscores = True
+        _load_member_data(member, req_resp.text)
+        if use_cache:
+            hiscore_cache.put(member.name, req_resp.status_code, req_resp.text)
+    elif (req_resp.status_code == requests.codes["not_found"]):
+        # not a failure, players can be hidden or too low for hiscores.
+        clantrack_log.log(f"Not on hiscores : {member.name}")
+        if use_cache:
+            hiscore_cache.put(member.name, req_resp.status_code, "")
     else:
-        clantrack_log.log(f"Failed to get member data : {member.name}")
+        clantrack_log.log(
+            f"Failed to get member data : {member.name}, "
+            f"status {req_resp.status_code}"
+        )
+    return True
+
+def _load_member_data(member, index_lite):
+    """
+    Loads the skills and activities from an index_lite hiscores response into
+    member and marks the member as being on the hiscores.
+    """
+    member_info = index_lite.splitlines()
+    for i in range(0, len(skill_labels)):
+        # skills: [rank,level,xp]
+        skills = member_info[i].split(",")
+        # re-order to match activities index, and replace -1's with 0
+        skill_array = [
+            int_0(skills[0]),
+            int_0(skills[2]),
+            int_0(skills[1])
+        ]
+        member.skills[skill_labels[i]] = skill_array
+    for i in range(0, len(activity_labels)):
+        # stat: [rank, score], starts after skills till end of activities
+        activivity_arr = member_info[len(skill_labels)+i].split(",")
+        activity = [
+            int_0(activivity_arr[0]), 
+            int_0(activivity_arr[1])
+        ]
+        member.activities[activity_labels[i]] = activity
+    member.on_hiscores = True
 
 def _get_clanmembers(
     session,
+    scheduler,
     ingame_members_list,
     highest_id,
     highest_entry_id
 ):
+    """
+    Adds the members in the ingame clan memberlist to ingame_members_list.
+    Raises a ClanListError if the list can not be retrieved or is empty, an
+    update with an empty list would see every member as leaving.
+    """
     clantrack_log.log(f"Starting clan memberlist retrieval...")
     if not isinstance(ingame_members_list, list):
         text = (
             "Object to fetch ingame data for is not of list[Member]."
         )
         raise NotAMemberList(text)
-    try:
-        memb_list_api_result = session.get(
-            _memberlist_base_url+zerobot_common.rs_api_clan_name, timeout=10
-        )
-    except requests.exceptions.Timeout:
-        clantrack_log.log(f"Retrying clan memberlist retrieval...")
-        return _get_clanmembers(session, ingame_members_list)
+    memb_list_api_result = scheduler.get(
+        session, _memberlist_base_url+settings["rs_api_clan_name"]
+    )
+    if memb_list_api_result is None:
+        text = "Failed to retrieve clan member list, no response."
+        clantrack_log.log(text)
+        raise ClanListError(text)
 
     # got a response, need to check if good response
     if (memb_list_api_result.status_code == requests.codes["ok"]):
@@ -290,32 +546,274 @@ def _get_clanmembers(
             memb.entry_id = highest_entry_id
             highest_entry_id += 1
             ingame_members_list.append(memb)
-        clantrack_log.log(f"Retrieved clan memberlist.")
     else:
-        clantrack_log.log("Failed to retrieve clan member list.")
+        text = (
+            f"Failed to retrieve clan member list, "
+            f"status {memb_list_api_result.status_code}."
+        )
+        clantrack_log.log(text)
+        raise ClanListError(text)
+    if len(ingame_members_list) == 0:
+        text = "Retrieved clan member list is empty."
+        clantrack_log.log(text)
+        raise ClanListError(text)
+    clantrack_log.log(f"Retrieved clan memberlist.")
 
-def get_ingame_memberlist(highest_id: int, highest_entry_id: int):
+class IngameJournal:
+    """
+    Streaming journal of members whose ingame stats were retrieved, written
+    next to the ingame_membs_ backup while the stats are being fetched. Lets
+    a restarted update continue where the previous attempt stopped.
+
+    Each line is the on_hiscores flag and the member string, tab separated.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = None
+        self._lock = threading.Lock()
+    def read(self):
+        """
+        Returns the members completed by a previous attempt as a dictionary of
+        lowercase name -> Member. Skips a damaged last line from a crash.
+        """
+        completed = dict()
+        if not os.path.exists(self.filename):
+            return completed
+        for line in utilities.read_file(self.filename).splitlines():
+            try:
+                on_hiscores, memb_str = line.split("\t", 1)
+                memb = Member.from_string(memb_str)
+            except Exception:
+                continue
+            memb.on_hiscores = (on_hiscores == "TRUE")
+            completed[memb.name.lower()] = memb
+        return completed
+    def open(self):
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        self._file = open(self.filename, "a", encoding="utf-8")
+    def write(self, member):
+        """
+        Appends a completed member, safe to call from the fetch threads.
+        """
+        line = f"{utilities.boolstr[member.on_hiscores]}\t{member.to_string()}\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def ingame_journal_filename(date_str):
+    return ingame_journal_folder + "ingame_membs_" + date_str + ".journal"
+
+def discard_ingame_journals():
+    """
+    Removes the fetch journals, call once the ingame data has been backed up.
+    """
+    folder = ingame_journal_folder
+    if not os.path.isdir(folder):
+        return
+    for filename in os.listdir(folder):
+        if filename.startswith("ingame_membs_") and filename.endswith(".journal"):
+            utilities.delete_file(folder + filename)
+
+def get_ingame_clanlist(scheduler=None):
+    """
+    Retrieves only the clan memberlist: name, rank, clan xp and kills for
+    everyone in a single request, without individual hiscore stats.
+    """
+    if scheduler is None:
+        scheduler = new_scheduler()
+    ingame_members_list = list()
+    _get_clanmembers(_thread_session(), scheduler, ingame_members_list, 0, 0)
+    return ingame_members_list
+
+def apply_refreshed_stats(member, ingame_memb):
+    """
+    Updates member with newer ingame data for the same name, and updates last
+    active if they made any gains. Only has hiscore stats to transfer if
+    ingame_memb was on the hiscores.
+    Leaves the rank alone, rank changes are for the daily update. A member
+    that needs an invite would otherwise not be seen as joining.
+    """
+    if member.last_active is None or member.last_active < datetime.utcnow():
+        if member.wasActive(ingame_memb):
+            member.last_active = datetime.utcnow()
+    member.clan_xp = ingame_memb.clan_xp
+    member.kills = ingame_memb.kills
+    if ingame_memb.on_hiscores:
+        member.transferIngameData(ingame_memb)
+
+class RollingRefresh:
+    """
+    Spreads out retrieving individual hiscore stats over the day instead of
+    fetching everyone at once for the daily update.
+
+    Every poll retrieves the cheap clan memberlist. Members whose clan xp or
+    kills changed since the previous poll have their hiscore stats fetched
+    first. Members that look dormant are trickled through in between, oldest
+    fetch first, just enough per poll to get to everyone once a day.
+    """
+    def __init__(self, interval_minutes):
+        self.polls_per_day = max(1, (24 * 60) // interval_minutes)
+        # lowercase name -> (clan_xp, kills) at the previous poll
+        self.clan_stats = dict()
+        # lowercase name -> time of last individual fetch
+        self.last_fetched = dict()
+    def plan(self, clan_list):
+        """
+        Returns the members of clan_list to fetch individual stats for this
+        poll, members with changed clan stats first.
+        """
+        changed = list()
+        dormant = list()
+        for memb in clan_list:
+            key = memb.name.lower()
+            previous = self.clan_stats.get(key)
+            self.clan_stats[key] = (memb.clan_xp, memb.kills)
+            # first time seeing someone is not a change, they get trickled
+            if previous is not None and previous != (memb.clan_xp, memb.kills):
+                changed.append(memb)
+            else:
+                dormant.append(memb)
+        dormant.sort(key=lambda memb: self.last_fetched.get(memb.name.lower(), 0))
+        trickle = -(-len(clan_list) // self.polls_per_day)
+        return changed + dormant[:trickle]
+    def poll(self, scheduler=None):
+        """
+        Runs one poll. Returns the clan list, members in it that were picked
+        for a fetch also have their hiscore stats filled in.
+        """
+        if scheduler is None:
+            scheduler = new_scheduler()
+        clan_list = get_ingame_clanlist(scheduler)
+        to_fetch = self.plan(clan_list)
+        workers = max(1, settings["ingame_fetch_workers"])
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(
+                lambda memb: _get_member_data(memb, scheduler, refresh=True),
+                to_fetch
+            ))
+        now = datetime.utcnow().timestamp()
+        for memb, finished in zip(to_fetch, done):
+            if finished:
+                self.last_fetched[memb.name.lower()] = now
+        clantrack_log.log(
+            f"Rolling refresh: {len(clan_list)} in clan list, fetched "
+            f"{len(to_fetch)}, {scheduler.requests} requests."
+        )
+        return clan_list
+
+def new_scheduler():
+    """
+    Creates a request scheduler for one run, using the rs api settings.
+    """
+    return RequestScheduler(
+        rate=settings["rs_api_requests_per_second"],
+        burst=settings["rs_api_requests_per_second"],
+        max_attempts=settings["rs_api_max_attempts"],
+        retry_budget=settings["rs_api_retry_budget"]
+    )
+
+def get_ingame_memberlist(
+    highest_id: int,
+    highest_entry_id: int,
+    scheduler: RequestScheduler = None,
+    progress=None
+):
+    """
+    Retrieves the clan memberlist and the hiscore stats of everyone in it.
+    progress - optional function that is called with short progress messages.
+    """
+    if progress is None:
+        progress = lambda msg: None
     #TODO: should remain disabled until .on_hiscores is disk saved
-    if zerobot_common.use_cached_ingame_data:
+    if settings["use_cached_ingame_data"]:
         date_str = datetime.utcnow().strftime(utilities.dateformat)
         cached_data_file = (
             "memberlists/current_members/ingame_membs_" + date_str + ".txt"
         )
         if os.path.exists(cached_data_file):
-            clantrack_log.log(
-                f"Using cached ingame data from {date_str}..."
-            )
-            return memberlist_from_disk(cached_data_file)
-    zerobot_common.drive_connect()
+            cached = memberlist_from_disk(cached_data_file)
+            # an empty list is from a failed retrieval, fetch again
+            if len(cached) > 0:
+                clantrack_log.log(
+                    f"Using cached ingame data from {date_str}..."
+                )
+                return cached
+    if scheduler is None:
+        scheduler = new_scheduler()
+    if settings["hiscore_cache_enabled"]:
+        hiscore_cache.prune()
     # start session to try to speed up rs api requests
     session = requests.session()
     ingame_members_list = list()
-    _get_clanmembers(session, ingame_members_list, highest_id, highest_entry_id)
+    _get_clanmembers(
+        session, scheduler, ingame_members_list, highest_id, highest_entry_id
+    )
+
+    progress(f"Retrieved clan list with {len(ingame_members_list)} members.")
+
+    # continue from the journal if a previous attempt today was interrupted
+    date_str = datetime.utcnow().strftime(utilities.dateformat)
+    journal = IngameJournal(ingame_journal_filename(date_str))
+    completed = journal.read()
+    to_fetch = list()
+    for memb in ingame_members_list:
+        done = completed.get(memb.name.lower())
+        if done is None:
+            to_fetch.append(memb)
+            continue
+        memb.transferIngameData(done)
+        memb.on_hiscores = done.on_hiscores
+    if len(to_fetch) < len(ingame_members_list):
+        clantrack_log.log(
+            f"Resuming from journal, "
+            f"{len(ingame_members_list) - len(to_fetch)} members done already."
+        )
+
+    fetched = [0]
+    fetched_lock = threading.Lock()
+    def fetch(memb, session=None):
+        if _get_member_data(memb, scheduler, session=session):
+            journal.write(memb)
+        with fetched_lock:
+            fetched[0] += 1
+            if fetched[0] % 100 == 0:
+                progress(f"Retrieved stats for {fetched[0]}/{len(to_fetch)}.")
     
-    # get updated stats for each member
+    # get updated stats for each member, several members at the same time.
+    # each thread fills in the stats of its own member objects.
     clantrack_log.log(f"Retrieving individual stats for members in clan...")
-    for ingame_memb in ingame_members_list:
-        _get_member_data(ingame_memb, session=session)
-    clantrack_log.log(f"Finished retrieving individual clan members stats.")
+    journal.open()
+    try:
+        workers = max(1, settings["ingame_fetch_workers"])
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # list() waits for all fetches and raises errors from the threads
+            list(pool.map(fetch, to_fetch))
+        # second pass for members that failed, one at a time with a fresh 
+        # retry budget, by now any throttling should have eased.
+        failed = scheduler.take_dead_letters()
+        if len(failed) > 0:
+            clantrack_log.log(
+                f"Retrying stats for {len(failed)} members that failed..."
+            )
+            scheduler.refill_budget()
+            for memb in failed:
+                fetch(memb, session=session)
+            for memb in scheduler.take_dead_letters():
+                clantrack_log.log(
+                    f"Failed to get member data : {memb.name}, "
+                    "keeping old stats."
+                )
+    finally:
+        journal.close()
+    msg = (
+        f"Finished retrieving individual clan members stats. "
+        f"{scheduler.requests} requests, {scheduler.retries} retries."
+    )
+    clantrack_log.log(msg)
+    progress(msg)
     
-    return ingame_members_list
\ No newline at end of file
+    return ingame_members_list
@@ -0,0 +1,60 @@
+# Converts all memberlist files below to another file format, run from the
+# bot folder with the format to convert to:
+#   python convert_memberlists.py binary
+#   python convert_memberlists.py text
+# Files are read in whatever format they are in now. Remember to set the
+# memberlist_file_format setting to the same format, or the bot will write
+# them back in the old format as it updates them.
+import os
+import sys
+import traceback
+import memberlist
+from memberlist import memberlist_from_disk, memberlist_to_disk
+
+# tries these specific files
+files = [
+    "memberlists/current_members.txt",
+    "memberlists/old_members.txt",
+    "memberlists/banned_members.txt"
+]
+# tries all memberlist files in these folders
+folders = [
+    "memberlists/banned_members/",
+    "memberlists/current_members/",
+    "memberlists/old_members/"
+]
+
+def convert(filename):
+    """
+    Rewrites a memberlist file in the current memberlist.file_format,
+    through a temporary file so a failed write can't lose the list.
+    """
+    mlist = memberlist_from_disk(filename)
+    temp_filename = filename + ".converting"
+    memberlist_to_disk(mlist, temp_filename)
+    os.replace(temp_filename, filename)
+    return len(mlist)
+
+def convert_all(file_format):
+    memberlist.file_format = file_format
+    filenames = [f for f in files if os.path.isfile(f)]
+    for folder in folders:
+        if not os.path.isdir(folder):
+            continue
+        for file in sorted(os.listdir(folder)):
+            # skip ingame data journals and other non memberlist files
+            if file.endswith(".txt"):
+                filenames.append(os.path.join(folder, file))
+    for filename in filenames:
+        try:
+            count = convert(filename)
+            print(f"converted {filename} ({count} members)")
+        except Exception:
+            print(f"unable to convert {filename}")
+            print(traceback.format_exc())
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] not in ("text", "binary"):
+        print("usage: python convert_memberlists.py text|binary")
+        sys.exit(1)
+    convert_all(sys.argv[1])
@@ -22,4 +22,6 @@ class StaffMemberError(Exception):
 class SiteDisabledError(Exception):
     pass
 class SiteConnectionError(Exception):
-    pass
\ No newline at end of file
+    pass
+class ClanListError(Exception):
+    pass
@@ -0,0 +1,72 @@
+"""
+Keeps the hiscore responses of individual players on disk, so an update that
+is repeated or restarted only needs to fetch players with outdated stats.
+
+Each player has their own small file containing the raw index_lite response,
+the response status and when it was retrieved. Players that are not on the
+hiscores (404 response) are kept for longer, their stats can't change often.
+"""
+import json
+import os
+import time
+from urllib.parse import quote
+from utilities import read_file, write_file
+
+class HiscoreCache:
+    """
+    HiscoreCache(folder, ttl, negative_ttl), ttl's are in seconds.
+    """
+    def __init__(self, folder, ttl, negative_ttl):
+        self.folder = folder
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+    def _filename(self, name):
+        # names are case insensitive, quote for characters unsafe in paths
+        return os.path.join(self.folder, quote(name.lower(), safe="") + ".json")
+    def _expired(self, entry, now):
+        if entry["status"] == 404:
+            return now - entry["fetched"] > self.negative_ttl
+        return now - entry["fetched"] > self.ttl
+    def _read(self, filename):
+        """
+        Reads a cache entry, None if the file is missing or damaged.
+        """
+        if not os.path.exists(filename):
+            return None
+        try:
+            return json.loads(read_file(filename, create=False))
+        except (ValueError, OSError):
+            return None
+    def get(self, name):
+        """
+        Returns the cached (status, body) response for name, or None if there
+        is no entry or the entry expired.
+        """
+        entry = self._read(self._filename(name))
+        if entry is None or self._expired(entry, time.time()):
+            return None
+        return (entry["status"], entry["body"])
+    def put(self, name, status, body):
+        """
+        Stores the response for name with the current time.
+        """
+        entry = {
+            "name": name,
+            "fetched": time.time(),
+            "status": status,
+            "body": body
+        }
+        write_file(json.dumps(entry), self._filename(name))
+    def prune(self):
+        """
+        Removes expired entries, keeps the cache from growing with players
+        that left the clan or renamed.
+        """
+        if not os.path.isdir(self.folder):
+            return
+        now = time.time()
+        for filename in os.listdir(self.folder):
+            filename = os.path.join(self.folder, filename)
+            entry = self._read(filename)
+            if entry is None or self._expired(entry, now):
+                os.remove(filename)
@@ -6,6 +6,8 @@ from utilities import (
     bracket_parser,
     boolstr
 )
+from statblock import StatBlock
+from operator import attrgetter
 import copy
 import ast
 
@@ -77,6 +79,58 @@ blank_notify_stats = {}
 for i in range(0, len(notify_role_names)):
     blank_notify_stats[notify_role_names[i]] = 0
 
+class SkillStats(StatBlock):
+    """
+    Skills of a member, label -> [rank, xp, level].
+    """
+    __slots__ = ()
+    labels = skill_labels
+    index = StatBlock.make_index(skill_labels)
+    width = 3
+class ActivityStats(StatBlock):
+    """
+    Activities of a member, label -> [rank, score].
+    """
+    __slots__ = ()
+    labels = activity_labels
+    index = StatBlock.make_index(activity_labels)
+    width = 2
+class NotifyStats(StatBlock):
+    """
+    Notify role counts of a member, role name -> count.
+    """
+    __slots__ = ()
+    labels = notify_role_names
+    index = StatBlock.make_index(notify_role_names)
+    width = 0
+
+def _parse_str_list(txt):
+    """
+    Reads a list of strings written as its repr, like ['a', 'b']. Splits 
+    simple lists directly, only uses literal_eval if there are quotes or 
+    escapes inside the strings.
+    """
+    if txt == "[]":
+        return list()
+    inner = txt[2:-2]
+    if (
+        txt[:2] == "['" and txt[-2:] == "']"
+        and "\\" not in inner
+        and '"' not in inner
+        and "'" not in inner.replace("', '", "")
+    ):
+        return inner.split("', '")
+    return ast.literal_eval(txt)
+
+def _parse_warnings(txt):
+    """
+    Reads the warnings of a member, written as [[warning 1][warning 2]..].
+    """
+    # almost nobody has warnings, skip the parser for those
+    if txt == "[]":
+        return list()
+    return [Warning.from_str(w) for w in bracket_parser(txt)]
+
 class NotAWarningError(Exception):
     pass
 
@@ -129,7 +183,35 @@ class Member:
     """
     Member(name, rank, clan_xp, kills).
     """
+    # fixed attributes instead of a __dict__ per member, we keep a lot of 
+    # them in memory. Any new attribute must be added here.
+    _base_slots = (
+        "name", "rank", "discord_rank", "site_rank", "join_date",
+        "passed_gem", "profile_link", "leave_date", "leave_reason",
+        "referral", "discord_id", "discord_name", "old_names", "last_active",
+        "warning_points", "warnings", "note1", "note2", "note3", "id",
+        "entry_id", "clan_xp", "kills", "skills", "activities", "misc",
+        "notify_stats", "days_inactive", "result_type", "row", "sheet",
+        "on_hiscores"
+    )
+    # only set on some members, by searches and stat comparisons.
+    _extra_slots = (
+        "status", "old_rank", "new_rank", "old_misc", "new_misc",
+        "mage_change", "melee_change", "range_change", "new_tags",
+        "lost_tags"
+    )
+    __slots__ = _base_slots + _extra_slots
     def __init__(self, name, rank, clan_xp, kills):
+        self._init_base(name, rank, clan_xp, kills)
+        self.warnings = list()
+        # skill xp and activity score dicts, guarantees presence.
+        self.skills = SkillStats()
+        self.activities = ActivityStats()
+        self.notify_stats = NotifyStats()
+    def _init_base(self, name, rank, clan_xp, kills):
+        """
+        Sets everything except the warnings and stats blocks.
+        """
         self.name = name
         self.rank = rank
         self.discord_rank = ""
@@ -145,7 +227,6 @@ class Member:
         self.old_names = list()
         self.last_active = None
         self.warning_points = 0
-        self.warnings = list()
         self.note1 = ""
         self.note2 = ""
         self.note3 = ""
@@ -153,11 +234,8 @@ class Member:
         self.entry_id = 0
         self.clan_xp = clan_xp
         self.kills = kills
-        # skill xp and activity score dicts, guarantees presence.
-        self.skills = copy.deepcopy(blank_skills)
-        self.activities = copy.deepcopy(blank_activities)
-        self.misc = copy.deepcopy(blank_misc)
-        self.notify_stats = copy.deepcopy(blank_notify_stats)
+        self.misc = dict(blank_misc)
+        self.misc["discord_roles"] = list()
         # not stored, based on last active, used for sorting inactives
         self.days_inactive = 0
         # not stored, only set if member originates from a search result,
@@ -166,6 +244,18 @@ class Member:
         self.row = None
         self.sheet = None
         self.on_hiscores = False
+    def __copy__(self):
+        """
+        Shallow copy, a lot faster than the generic copy for slots.
+        """
+        memb = Member.__new__(Member)
+        for attr, value in zip(Member._base_slots, _get_base_slots(self)):
+            setattr(memb, attr, value)
+        for attr in Member._extra_slots:
+            value = getattr(self, attr, _unset)
+            if value is not _unset:
+                setattr(memb, attr, value)
+        return memb
     def __eq__(self, other):
         """
         Used for native comparison and other functions like list.remove(), 
@@ -204,22 +294,7 @@ class Member:
         for x in self.old_names:
             old_names += x + ","
         old_names = old_names[:-1]
-        warnings = "["
-        for w in self.warnings:
-            warnings += str(w)
-        warnings += "]"
-        skills = "["
-        for v in self.skills.values():
-            skills += str(v) + ", "
-        skills = skills[:-2] + "]"
-        activities = "["
-        for v in self.activities.values():
-            activities += str(v) + ", "
-        activities = activities[:-2] + "]"
-        notify_stats = "["
-        for v in self.notify_stats.values():
-            notify_stats += str(v) + ", "
-        notify_stats = notify_stats[:-2] + "]"
+        warnings, skills, activities, notify_stats = self._stat_strings()
         misc = ""
         for _, v in self.misc.items():
             # if needed can process v to string first
@@ -246,6 +321,20 @@ class Member:
             f"\t{misc}"
         )
         return user_str
+    def _stat_strings(self):
+        """
+        Text of the warnings, skills, activities and notify stats columns.
+        """
+        warnings = "["
+        for w in self.warnings:
+            warnings += str(w)
+        warnings += "]"
+        return (
+            warnings,
+            self.skills.to_string(),
+            self.activities.to_string(),
+            self.notify_stats.to_string()
+        )
     def to_string(self):
         """
         Writes a member to a string. Used for writing to memberlist on disk.
@@ -255,20 +344,31 @@ class Member:
         """
         return str(self)
     @staticmethod
-    def from_string(member_str):
+    def from_string(member_str, lazy=False):
         """
         Reads a member from a string. Used for reading from memberlist on disk.
         member_str: Single line string with member attributes separated by tabs.
+        lazy: Returns a LazyMember, that only reads the stats and warnings 
+            when they are used.
 
         output: A Member object.
         """
         memb_info = member_str.split("\t")
-        memb = Member(
-            memb_info[0],
-            memb_info[1],
-            int_0(memb_info[21]),
-            int_0(memb_info[22])
-        )
+        if lazy:
+            memb = LazyMember(
+                memb_info[0],
+                memb_info[1],
+                int_0(memb_info[21]),
+                int_0(memb_info[22]),
+                (memb_info[17], memb_info[23], memb_info[24], memb_info[25])
+            )
+        else:
+            memb = Member(
+                memb_info[0],
+                memb_info[1],
+                int_0(memb_info[21]),
+                int_0(memb_info[22])
+            )
         memb.discord_rank = memb_info[2]
         memb.site_rank = memb_info[3]
         memb.join_date = memb_info[4]
@@ -289,23 +389,19 @@ class Member:
         memb.id = int_0(memb_info[14])
         memb.entry_id = int_0(memb_info[15])
         memb.warning_points = int_0(memb_info[16])
-        warnings = bracket_parser(memb_info[17])
-        for w in warnings:
-            memb.warnings.append(Warning.from_str(w))
         memb.note1 = memb_info[18]
         memb.note2 = memb_info[19]
         memb.note3 = memb_info[20]
-        for num,x in enumerate(ast.literal_eval(memb_info[23])):
-            memb.skills[skill_labels[num]] = x
-        for num,x in enumerate(ast.literal_eval(memb_info[24])):
-            memb.activities[activity_labels[num]] = x
-        for num,x in enumerate(ast.literal_eval(memb_info[25])):
-            memb.notify_stats[notify_role_names[num]] = x
+        if not lazy:
+            memb.warnings = _parse_warnings(memb_info[17])
+            memb.skills = SkillStats.from_string(memb_info[23])
+            memb.activities = ActivityStats.from_string(memb_info[24])
+            memb.notify_stats = NotifyStats.from_string(memb_info[25])
         # load entries into misc per label.
         for i in range(len(misc_labels)):
             memb.misc[misc_labels[i]] = memb_info[i+26]
         # process misc entries further if needed
-        memb.misc["discord_roles"] = ast.literal_eval(memb.misc["discord_roles"])
+        memb.misc["discord_roles"] = _parse_str_list(memb.misc["discord_roles"])
         memb.misc["events_started"] = int_0(memb.misc["events_started"])
         return memb
     def transferIngameData(self, other):
@@ -313,10 +409,8 @@ class Member:
         Transfers ingame hiscore stats to self from another member object.
         Skips clan stats (name, rank, clan xp, kills) and non-hiscore stats.
         """
-        for k, v in other.skills.items():
-            self.skills[k] = v
-        for k, v in other.activities.items():
-            self.activities[k] = v
+        self.skills = other.skills.copy()
+        self.activities = other.activities.copy()
     def loadFromOldName(self, other):
         """
         Load all the old data except the new ingame stats.
@@ -351,8 +445,7 @@ class Member:
         #self.activities = {}             # already updated
         for k, v in other.misc.items():
             self.misc[k] = v
-        for k, v in other.notify_stats.items():
-            self.notify_stats[k] = v
+        self.notify_stats = other.notify_stats.copy()
     @staticmethod
     def from_sheet(memb_info):
         """
@@ -463,8 +556,10 @@ class Member:
         if other.clan_xp > self.clan_xp: return True
         if other.kills > self.kills: return True
         if other.activities["runescore"][1] > self.activities["runescore"][1]: return True
-        for k, v in other.skills.items():
-            if v[1] > self.skills[k][1]:
+        for new_xp, old_xp in zip(
+            other.skills.column(1), self.skills.column(1)
+        ):
+            if new_xp > old_xp:
                 return True
         # dont have to check individual clues, comparing to self, cant lower
         if other.total_clues() > self.total_clues(): return True
@@ -486,8 +581,10 @@ class Member:
         # can't lose clan kills, lower clan kills = not same person
         if other.kills < self.kills: 
             return -1
-        for k,v in other.skills.items():
-            if v[1] < self.skills[k][1]:
+        for new_xp, old_xp in zip(
+            other.skills.column(1), self.skills.column(1)
+        ):
+            if new_xp < old_xp:
                 return -1
         # cant lose clue count, fewer clues = different person
         if other.total_clues() < self.total_clues(): return -1
@@ -644,6 +741,56 @@ class Member:
         memb.old_misc = copy.deepcopy(other.misc)
         return memb
 
+def _lazy_field(slot):
+    """
+    Property for a LazyMember field, reads the stored text on first use.
+    """
+    def get(self):
+        if self._raw is not None:
+            self._decode()
+        return slot.__get__(self, Member)
+    def set(self, value):
+        if self._raw is not None:
+            self._decode()
+        slot.__set__(self, value)
+    return property(get, set)
+
+class LazyMember(Member):
+    """
+    LazyMember(name, rank, clan_xp, kills, raw), raw is the text of the
+    warnings, skills, activities and notify stats columns.
+
+    A Member read from a memberlist line that only reads those columns when
+    one of them is first used. Most lookups only need names, ids and dates,
+    this saves reading all the stats of every member for them. Writing an
+    untouched LazyMember back uses the text it was read from.
+    """
+    __slots__ = ("_raw",)
+    def __init__(self, name, rank, clan_xp, kills, raw):
+        # the stats blocks come from raw, no empty ones to throw away
+        self._init_base(name, rank, clan_xp, kills)
+        self._raw = raw
+    def _stat_strings(self):
+        # not read yet so not changed either, the original text still holds
+        if self._raw is not None:
+            return self._raw
+        return super()._stat_strings()
+    def _decode(self):
+        warnings, skills, activities, notify_stats = self._raw
+        self._raw = None
+        self.warnings = _parse_warnings(warnings)
+        self.skills = SkillStats.from_string(skills)
+        self.activities = ActivityStats.from_string(activities)
+        self.notify_stats = NotifyStats.from_string(notify_stats)
+    warnings = _lazy_field(Member.warnings)
+    skills = _lazy_field(Member.skills)
+    activities = _lazy_field(Member.activities)
+    notify_stats = _lazy_field(Member.notify_stats)
+
+# for Member.__copy__
+_get_base_slots = attrgetter(*Member._base_slots)
+_unset = object()
+
 def valid_discord_id(id):
     """
     Returns True iff id is a valid discord id.
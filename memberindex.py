@@ -0,0 +1,102 @@
+"""
+Hash map index of a memberlist, to find a member by one of its ids without
+going through the whole list. memberlist_get uses the index of a list if it
+has one, see memberlist.index_memberlists.
+"""
+from member import valid_discord_id, valid_profile_link
+
+# the ids members are indexed by, names are indexed in lowercase
+_keys = ["discord_id", "profile_link", "name", "id", "entry_id"]
+
+def _values(memb):
+    return (
+        memb.discord_id,
+        memb.profile_link,
+        memb.name.lower(),
+        memb.id,
+        memb.entry_id
+    )
+
+class MemberIndex:
+    """
+    MemberIndex(memberlist), get() gives the same member as memberlist_get
+    on the memberlist, as long as the index is kept up to date:
+     - add / remove members through add() and remove(), or rebuild()
+     - rebuild() after changing the ids or old names of indexed members
+    A member found by get() is always checked against the id, a member with
+    changed ids is never wrongly returned but can be missed until rebuild().
+    """
+    def __init__(self, memberlist):
+        self.memberlist = memberlist
+        self.rebuild()
+    def rebuild(self):
+        self.size = 0
+        # key -> {value: [members]}, in the order of the list
+        self._maps = {key: dict() for key in _keys}
+        # lowercase old name -> [members]
+        self._old_names = dict()
+        # id(member) -> the values it was indexed with
+        self._indexed = dict()
+        for memb in self.memberlist:
+            self.add(memb)
+    def add(self, memb):
+        values = _values(memb)
+        old_names = [name.lower() for name in memb.old_names]
+        for key, value in zip(_keys, values):
+            self._maps[key].setdefault(value, []).append(memb)
+        for name in old_names:
+            self._old_names.setdefault(name, []).append(memb)
+        self._indexed[id(memb)] = (values, old_names)
+        self.size += 1
+    def remove(self, memb):
+        entry = self._indexed.pop(id(memb), None)
+        if entry is None:
+            return
+        values, old_names = entry
+        for key, value in zip(_keys, values):
+            _remove_from(self._maps[key], value, memb)
+        for name in old_names:
+            _remove_from(self._old_names, name, memb)
+        self.size -= 1
+    def get(self, id, type=None):
+        """
+        Same as memberlist_get, the first member in the list matching id.
+        """
+        if type is None:
+            if valid_discord_id(id):
+                key, value = "discord_id", id
+            elif valid_profile_link(id):
+                key, value = "profile_link", id
+            elif isinstance(id, str):
+                key, value = "name", id.lower()
+            else:
+                return None
+        elif type == "name":
+            key, value = "name", id.lower()
+        elif type in ("id", "entry_id", "discord_id"):
+            key, value = type, id
+        else:
+            return None
+        for memb in self._maps[key].get(value, ()):
+            if memb.matches_id(id, type):
+                return memb
+        return None
+    def get_old_name(self, name):
+        """
+        Members that had name (case insensitive) as one of their old names.
+        """
+        name = name.lower()
+        return [
+            memb for memb in self._old_names.get(name, ())
+            if name in (old_name.lower() for old_name in memb.old_names)
+        ]
+
+def _remove_from(index_map, value, memb):
+    members = index_map.get(value)
+    if members is None:
+        return
+    members = [m for m in members if m is not memb]
+    if len(members) == 0:
+        del index_map[value]
+    else:
+        index_map[value] = members
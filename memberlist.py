@@ -1,12 +1,67 @@
+import os
 import traceback
 import utilities
-from utilities import read_file, write_file
+from utilities import read_file, write_file_atomic
 from member import Member
+from memberindex import MemberIndex
+from namesearch import partial_cutoff
+from memberlist_binary import (
+    is_binary_memberlist,
+    memberlist_to_bytes,
+    memberlist_from_bytes
+)
+from memberlist_schema import (
+    line_version,
+    header_line,
+    split_header,
+    upgrade_lines
+)
 from datetime import datetime
 from exceptions import NotAMember, NotAMemberList
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process, utils
 import copy
 
+# format used by memberlist_to_disk, "text" or "binary". Reading detects the
+# format of the file, so this can be changed at any time. Set from settings
+# by zerobot_common.
+file_format = "text"
+# MemberlistJournal with the edits not yet written to the full lists, applied
+# by memberlist_from_disk. None if journaling is disabled. Set by 
+# zerobot_common.
+journal = None
+# MemberlistDB with a copy of the memberlists, used by memberlist_lookup
+# while it is up to date with the files. None if the database is disabled.
+# Set by zerobot_common.
+database = None
+# MemberIndex of the long lived memberlists, by id() of the list. Set up
+# with index_memberlists.
+_indexes = dict()
+
+def index_memberlists(*memberlists):
+    """
+    Indexes the memberlists, memberlist_get on them uses the index instead 
+    of going through the list. Replaces the indexes of any other lists, the 
+    index keeps its list in memory.
+
+    memberlist_add / remove / move keep the index up to date. Call this again
+    after editing the names, old names, discord ids, profile links, ids or 
+    entry ids of members in the lists.
+    """
+    _indexes.clear()
+    for memberlist in memberlists:
+        _indexes[id(memberlist)] = MemberIndex(memberlist)
+def _index(memberlist):
+    """
+    The MemberIndex of memberlist, None if it has none.
+    """
+    index = _indexes.get(id(memberlist))
+    if index is None or index.memberlist is not memberlist:
+        return None
+    if index.size != len(memberlist):
+        # members added or removed directly instead of by memberlist_add
+        index.rebuild()
+    return index
+
 def memberlist_get(
     memberlist,
     id,
@@ -20,11 +75,43 @@ def memberlist_get(
      - A valid ingame name, string of 1 to 12 characters, case insensitive
     
     Assumes unique ids, returns the first match found. None if no match found.
+    Uses the index of the memberlist if it has one, see index_memberlists.
     """
+    index = _index(memberlist)
+    if index is not None:
+        return index.get(id, type)
     for memb in memberlist:
         if memb.matches_id(id, type):
             return memb
     return None
+def memberlist_lookup(filename, id, type=None):
+    """
+    memberlist_get on the memberlist stored in filename. For when you only
+    need one member, with the memberlist database enabled this is a query
+    instead of reading the full list.
+    The database is only used while it has the same version of the list as
+    the file and journal, it can be behind them after a crash or when it was
+    turned off for a while.
+    """
+    if (
+        database is not None
+        and database.is_current(filename, storage_stamp(filename))
+    ):
+        return database.get(filename, id, type)
+    return memberlist_get(memberlist_from_disk(filename, lazy=True), id, type)
+def storage_stamp(filename):
+    """
+    Size and modification time of the memberlist file and the memberlist 
+    journal. Changes whenever the version of the list stored on disk does.
+    """
+    stamp = []
+    for name in [filename, None if journal is None else journal.filename]:
+        if name is None or not os.path.exists(name):
+            stamp.append("-")
+        else:
+            stat = os.stat(name)
+            stamp.append(f"{stat.st_size}:{stat.st_mtime_ns}")
+    return ",".join(stamp)
 def memberlist_get_all(
     memberlist,
     id,
@@ -32,41 +119,51 @@ def memberlist_get_all(
 ):
     """
     Find members in a memberlist that can be identified by the id. Includes
-    partial name matches and matches in old names of members. 
+    matches in old names of members, and partial name matches if partial.
     Result is a list that may be empty or very large if partial name is vague.
     The id must be either:
      - A valid discord id, integer with 17+ digits (705523860375863427)
      - A valid profile link, string url (https://zer0pvm.com/members/2790316)
      - A valid ingame name, string of 1 to 12 characters, case insensitive
+    
+    Ordered as exact matches, old name matches and then partial matches with
+    the most similar names first. For many searches on the same lists use a
+    namesearch.NameSearchIndex instead.
     """
     exact = []
     exact_old = []
-    partial = []
-    for memb in memberlist:
-        similarity = fuzz.partial_token_sort_ratio(str(id), memb.name)
+    found = set()
+    for num, memb in enumerate(memberlist):
         if memb.matches_id(id):
             memb.result_type = "exactname"
             exact.append(memb)
-        elif partial:
-            similarity = fuzz.partial_token_sort_ratio(str(id), memb.name)
-            if similarity > 75:
-                memb.result_type = "partialname"
-                # insert partial matches in order of similarity
-                for i in range(len(partial)):
-                    if similarity > partial[i][1]:
-                        partial.insert(i, (memb, similarity))
-                        break
-                if len(partial) == 0 or i == len(partial)-1:
-                    partial.append((memb, similarity))
-        else:
+            found.add(num)
+        elif isinstance(id, str):
             for old_name in memb.old_names:
-                if (old_name.lower() == id):
+                if (old_name.lower() == id.lower()):
                     memb.result_type = "oldname"
                     exact_old.append(memb)
-    # extract only the member part
-    partial = list(map(lambda memb: memb[0], partial))
+                    found.add(num)
+                    break
+    partials = []
+    if partial and isinstance(id, str):
+        # scores all names in one batch, sorted by similarity
+        matches = process.extract(
+            id,
+            [memb.name for memb in memberlist],
+            scorer=fuzz.partial_token_sort_ratio,
+            processor=utils.default_process,
+            score_cutoff=partial_cutoff,
+            limit=None
+        )
+        for _, similarity, num in matches:
+            if similarity <= partial_cutoff or num in found:
+                continue
+            memb = memberlist[num]
+            memb.result_type = "partialname"
+            partials.append(memb)
     # return sorted in this order
-    return exact + exact_old + partial
+    return exact + exact_old + partials
 def memberlist_add(memberlist, member):
     """
     Appends the member element to the memberlist by reference. The member 
@@ -75,7 +172,10 @@ def memberlist_add(memberlist, member):
     if not isinstance(member, Member):
         text = f"Object to append to list is not of Member: {str(member)}\n"
         raise NotAMember(text)
+    index = _index(memberlist)
     memberlist.append(member)
+    if index is not None:
+        index.add(member)
 def memberlist_remove(memberlist, member):
     """
     Find a member in a memberlist and remove it from the memberlist. Does 
@@ -88,7 +188,10 @@ def memberlist_remove(memberlist, member):
     if not isinstance(member, Member):
         member = memberlist_get(memberlist, member)
     if member is not None:
+        index = _index(memberlist)
         memberlist.remove(member)
+        if index is not None:
+            index.remove(member)
     return member
 def memberlist_move(from_list, to_list, member):
     """
@@ -108,37 +211,82 @@ def memberlist_to_disk(memberlist, filename):
     filename: A filename string.
 
     output: None, file now contains members as lines separated by newline 
-    (\n) characters with attributes separated by tabs.
+    (\n) characters with attributes separated by tabs, after a header line
+    with the version of the line layout.
+
+    The file is replaced atomically, a crash during the write leaves the 
+    previous version of the file intact.
     """
     if not isinstance(memberlist, list):
         text = f"Object to be written to disk is not of list[Member].\n"
         raise NotAMemberList(text)
-    return write_file(memberlist_to_string(memberlist), filename)
-def memberlist_from_disk(filename):
+    if file_format == "binary":
+        return write_file_atomic(memberlist_to_bytes(memberlist), filename)
+    return write_file_atomic(
+        header_line() + "\n" + memberlist_to_string(memberlist), filename
+    )
+def memberlist_from_disk(filename, lazy=False):
     """
     Reads a memberlist from disk.
     filename: A filename string pointing to a memberlist file containing 
     members as lines separated by newline (\n) characters with attributes 
     separated by tabs.
+    lazy: For read only lookups, only reads the stats of members when they 
+    are used. Binary memberlists are fast to read already, lazy is ignored.
+
+    Includes the edits in the memberlist journal that were not written to 
+    the file yet. Always reads the files, they are the primary storage the 
+    memberlist database is synced from.
 
     output: A list of Member objects.
     """
-    memberlist_str = read_file(filename)
-    return memberlist_from_string(memberlist_str)
-def memberlist_from_string(memberlist_string):
+    # journal first, if the full list gets written in between its entries
+    # no longer match the file and are skipped.
+    entries = [] if journal is None else journal.read()
+    if not os.path.exists(filename):
+        # creates the empty file, like before
+        read_file(filename)
+    with open(filename, "rb") as file:
+        data = file.read()
+    if is_binary_memberlist(data):
+        try:
+            mlist = memberlist_from_bytes(data)
+        except Exception as ex:
+            text = f"File {filename} is not a valid binary memberlist. {ex}\n"
+            raise NotAMemberList(text)
+        if len(entries) == 0:
+            return mlist
+        lines = [memb.to_string() for memb in mlist]
+        if journal.apply(entries, filename, lines) == 0:
+            return mlist
+        return memberlist_from_string("\n".join(lines), lazy)
+    text = data.decode("utf-8")
+    if len(entries) > 0:
+        lines = text.splitlines()
+        # journaled in the version of the file, upgraded after
+        version = split_header(lines)
+        if journal.apply(entries, filename, lines) > 0:
+            text = "\n".join([header_line(version)] + lines)
+    return memberlist_from_string(text, lazy)
+def memberlist_from_string(memberlist_string, lazy=False):
     """
     Reads a memberlist from a string. Used for reading memberlist from disk.
     memberlist_string: A string containing members as lines separated by
-    newline (\n) characters with attributes separated by tabs.
+    newline (\n) characters with attributes separated by tabs. Lines after
+    a header line of an older version are upgraded to the current version.
+    lazy: Reads the members as LazyMember, see memberlist_from_disk.
 
     output: A list of Member objects.
     """
     try:
         result = list()
         memberlist_array = memberlist_string.splitlines()
+        version = split_header(memberlist_array)
+        if version != line_version:
+            memberlist_array = list(upgrade_lines(memberlist_array, version))
         for memb_str in memberlist_array:
             try:
-                result.append(Member.from_string(memb_str))
+                result.append(Member.from_string(memb_str, lazy))
             except Exception as ex:
                 text = f"String to be read is not a Member: {memb_str}\n"
                 print(traceback.format_exc())
@@ -186,25 +334,13 @@ def memberlist_sort_name(mlist):
             j -= 1
         mlist[j+1] = key
 
-# for sorting memberlist accounting for jagex spaces
+# plain sorts on a single value, stable so equal values keep list order.
 def memberlist_sort_days_inactive(mlist):
-    if len(mlist) == 0: return
-    if len(mlist) == 1: return
-    for i in range(1, len(mlist)):
-        key = mlist[i]
-
-        j = i-1
-        while j >= 0 and key.days_inactive > mlist[j].days_inactive:
-            mlist[j+1] = mlist[j]
-            j -= 1
-        mlist[j+1] = key
-
-# for sorting memberlist accounting for jagex spaces
+    mlist.sort(key=lambda memb: memb.days_inactive, reverse=True)
 def memberlist_sort_clan_xp(mlist,asc=True):
-    memberlist_sort(mlist, clan_xp_cond, asc=asc)
-# for sorting memberlist accounting for jagex spaces
+    mlist.sort(key=lambda memb: memb.clan_xp, reverse=not asc)
 def memberlist_sort_leave_date(mlist, asc=True):
-    memberlist_sort(mlist, leave_date_cond, asc=asc)
+    mlist.sort(key=lambda memb: memb.leave_date, reverse=not asc)
 
 # for sorting memberlist accounting for jagex spaces
 def memberlist_sort(mlist, sort_cond, asc=True):
@@ -306,22 +442,24 @@ def memberlist_compare_stats(newlist, oldlist):
     """
     staying_members = []
     joining_members = []
-    leaving_members = copy.deepcopy(oldlist)
     renamed_members = []
+    # old members that were found, by id()
+    found = set()
+    index = MemberIndex(oldlist)
     # first pass to identify who stayed, joined and renamed
     for memb in newlist:
         # try finding by discord id, most likely
-        old_memb = memberlist_get(oldlist, memb.discord_id)
+        old_memb = index.get(memb.discord_id)
         # try site link
         if old_memb is None:
-            old_memb = memberlist_get(oldlist, memb.profile_link)
+            old_memb = index.get(memb.profile_link)
         # try same ingame name
         if old_memb is None:
-            old_memb = memberlist_get(oldlist, memb.name)
+            old_memb = index.get(memb.name)
         # try old names if still not found
         if old_memb is None:
             for old_name in memb.old_names:
-                old_memb = memberlist_get(oldlist, old_name)
+                old_memb = index.get(old_name)
                 if old_memb is not None: break
         
         # not found = mark as new member
@@ -334,9 +472,10 @@ def memberlist_compare_stats(newlist, oldlist):
         if old_memb.name != memb.name:
             memb.old_names = [old_memb.name]
             renamed_members.append(memb)
-        # remove from leaving
-        leaving_members.remove(old_memb)
-        
+        found.add(id(old_memb))
+    leaving_members = [
+        copy.deepcopy(memb) for memb in oldlist if id(memb) not in found
+    ]
     return CompareResult(
         staying_members, joining_members, leaving_members, renamed_members
     )
@@ -0,0 +1,212 @@
+"""
+Compressed archive of the daily memberlist backups.
+
+Each day is stored as the changes since the previous stored day, with a
+full copy (keyframe) every few days. Most members only change a few columns
+from one day to the next, so a day takes a small fraction of a full copy.
+Any day is rebuilt from the keyframe before it and the days after that.
+
+Files, zlib compressed json, one per kind of list per day:
+    memberlists/archive/<kind>/<date>.full.zlib
+        {"lines": [member lines]}
+    memberlists/archive/<kind>/<date>.delta.zlib
+        {"base": date, "keys": [...], "changed": {key: {column: value}},
+         "new": {key: line}}
+keys are the entry keys of the lines in order (see memberlist_events), lines
+of keys in neither changed or new are the same as on the base date. Both
+also have the "version" of the line layout (see memberlist_schema), files
+without one are from before it changed. Lines of older versions are
+upgraded when loaded.
+"""
+import json
+import zlib
+import os
+from datetime import datetime
+import utilities
+from memberlist import memberlist_from_disk
+from memberlist_events import _keyed
+from memberlist_schema import line_version, headerless_version, upgrade_lines
+
+# kinds of daily backups, and the folder and prefix of their old text files
+archive_kinds = {
+    "current_membs": "memberlists/current_members/",
+    "old_membs": "memberlists/old_members/",
+    "banned_membs": "memberlists/banned_members/",
+    "ingame_membs": "memberlists/current_members/"
+}
+
+class MemberlistArchive:
+    """
+    MemberlistArchive(folder, keyframe_days), keyframe_days is the number
+    of days between full copies.
+    """
+    def __init__(self, folder, keyframe_days=7):
+        self.folder = folder
+        self.keyframe_days = keyframe_days
+    def _filename(self, kind, date_str, full):
+        ext = ".full.zlib" if full else ".delta.zlib"
+        return os.path.join(self.folder, kind, date_str + ext)
+    def _files(self, kind):
+        """
+        Dictionary of date -> True for keyframes, False for deltas.
+        """
+        folder = os.path.join(self.folder, kind)
+        if not os.path.isdir(folder):
+            return dict()
+        files = dict()
+        for file in os.listdir(folder):
+            if file.endswith(".full.zlib"):
+                files[file[:-len(".full.zlib")]] = True
+            elif file.endswith(".delta.zlib"):
+                files[file[:-len(".delta.zlib")]] = False
+        return files
+    def dates(self, kind):
+        return sorted(self._files(kind))
+    def has(self, kind, date_str):
+        return date_str in self._files(kind)
+    def _read(self, filename):
+        with open(filename, "rb") as file:
+            return json.loads(zlib.decompress(file.read()).decode("utf-8"))
+    def load(self, kind, date_str):
+        """
+        The member lines of kind on date_str, None if not in the archive.
+        """
+        files = self._files(kind)
+        if date_str not in files:
+            return None
+        # walk back to the keyframe, then apply the deltas going forward
+        chain = []
+        while True:
+            data = self._read(self._filename(kind, date_str, files[date_str]))
+            if files[date_str]:
+                lines = data["lines"]
+                version = data.get("version", headerless_version)
+                break
+            chain.append(data)
+            date_str = data["base"]
+        for delta in reversed(chain):
+            # a delta is made against its base in its own version
+            delta_version = delta.get("version", headerless_version)
+            if delta_version != version:
+                lines = list(upgrade_lines(lines, version, delta_version))
+                version = delta_version
+            lines = _apply_delta(lines, delta)
+        return list(upgrade_lines(lines, version))
+    def store(self, kind, date_str, lines):
+        """
+        Adds the member lines of kind for date_str to the archive. Days have
+        to be stored in order, date_str can not be before the last stored
+        day. Storing the last day again replaces it.
+        """
+        files = self._files(kind)
+        dates = sorted(files)
+        if len(dates) > 0 and date_str < dates[-1]:
+            raise ValueError(
+                f"Can not archive {kind} {date_str}, {dates[-1]} is already "
+                f"archived"
+            )
+        earlier = [d for d in dates if d < date_str]
+        keyframes = [d for d in earlier if files[d]]
+        full = True
+        if len(keyframes) > 0:
+            last_key = datetime.strptime(keyframes[-1], utilities.dateformat)
+            day = datetime.strptime(date_str, utilities.dateformat)
+            full = (day - last_key).days >= self.keyframe_days
+        if full:
+            data = {"lines": list(lines)}
+        else:
+            base = earlier[-1]
+            data = _make_delta(base, self.load(kind, base), lines)
+        data["version"] = line_version
+        utilities.write_file_atomic(
+            # lzma is 20% smaller, but 5 times slower to rebuild a day from
+            zlib.compress(json.dumps(data).encode("utf-8"), 6),
+            self._filename(kind, date_str, full)
+        )
+        # replaced a stored day with the other type of file
+        other = self._filename(kind, date_str, not full)
+        if os.path.exists(other):
+            os.remove(other)
+
+def _make_delta(base, base_lines, lines):
+    old = _keyed(base_lines)
+    new = _keyed(lines)
+    changed = dict()
+    new_lines = dict()
+    for key, line in new.items():
+        old_line = old.get(key)
+        if old_line is None:
+            new_lines[key] = line
+            continue
+        if old_line == line:
+            continue
+        old_cols = old_line.split("\t")
+        cols = line.split("\t")
+        if len(old_cols) != len(cols):
+            new_lines[key] = line
+            continue
+        changed[key] = {
+            str(num): value
+            for num, (old_value, value) in enumerate(zip(old_cols, cols))
+            if old_value != value
+        }
+    return {
+        "base": base, "keys": list(new), "changed": changed, "new": new_lines
+    }
+
+def _apply_delta(base_lines, delta):
+    old = _keyed(base_lines)
+    lines = []
+    for key in delta["keys"]:
+        if key in delta["new"]:
+            lines.append(delta["new"][key])
+            continue
+        line = old[key]
+        fields = delta["changed"].get(key)
+        if fields is not None:
+            cols = line.split("\t")
+            for num, value in fields.items():
+                cols[int(num)] = value
+            line = "\t".join(cols)
+        lines.append(line)
+    return lines
+
+def backup_filename(kind, date_str):
+    """
+    Filename of a daily backup of kind as a memberlist file.
+    """
+    return archive_kinds[kind] + kind + "_" + date_str + ".txt"
+
+def backup_dates(kind):
+    """
+    Dates of the daily backup files of kind, oldest first.
+    """
+    folder = archive_kinds[kind]
+    if not os.path.isdir(folder):
+        return []
+    prefix = kind + "_"
+    return sorted(
+        file[len(prefix):-len(".txt")] for file in os.listdir(folder)
+        if file.startswith(prefix) and file.endswith(".txt")
+    )
+
+def remove_archived_backups(archive, kind, before_date):
+    """
+    Removes the daily backup files of kind from before before_date that are
+    in the archive. Only if the archived version has the same members.
+    Returns the number of files removed.
+    """
+    removed = 0
+    for date_str in backup_dates(kind):
+        if date_str >= before_date:
+            continue
+        lines = archive.load(kind, date_str)
+        if lines is None:
+            continue
+        filename = backup_filename(kind, date_str)
+        file_lines = [m.to_string() for m in memberlist_from_disk(filename)]
+        if file_lines != lines:
+            continue
+        os.remove(filename)
+        removed += 1
+    return removed
@@ -0,0 +1,251 @@
+"""
+Binary memberlist file format. Much smaller and faster to read and write
+than the text format, used by memberlist_to_disk when the memberlist file
+format setting is binary. memberlist_from_disk reads both formats.
+
+Layout, all numbers little endian:
+- magic b"ZBML", format version (uint16), member count (uint32)
+- schema length (uint32) and schema, json with the names of the number and
+  text fields and the labels of the stat blocks, in the order they are
+  stored in.
+- body, zlib compressed, containing:
+  - number section, a fixed width row of int64 per member: the number 
+    fields followed by the skills, activities and notify stats.
+  - text section, utf-8, a line per member with the text fields separated 
+    by tabs. Same restrictions as the text format, no tabs or newlines.
+
+Most stats are small numbers or 0, the compression keeps the fixed width
+rows from taking more space than the text format would.
+
+Fields are looked up by name from the schema when reading, so a file that
+was written before fields or stat labels were added still reads fine. New
+fields get their default value, unknown ones are skipped.
+"""
+import json
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from member import (
+    Member,
+    SkillStats,
+    ActivityStats,
+    NotifyStats,
+    misc_labels,
+    _parse_warnings,
+    _parse_str_list
+)
+
+magic = b"ZBML"
+version = 1
+_header = struct.Struct("<4sHII")
+_epoch = datetime(1970, 1, 1)
+# last_active of None, not a valid number of days
+_no_date = -(2**63)
+
+number_fields = [
+    "clan_xp", "kills", "discord_id", "id", "entry_id", "warning_points",
+    "passed_gem", "last_active", "events_started"
+]
+text_fields = [
+    "name", "rank", "discord_rank", "site_rank", "join_date", "profile_link",
+    "leave_date", "leave_reason", "referral", "discord_name", "old_names",
+    "warnings", "note1", "note2", "note3"
+] + [label for label in misc_labels if label != "events_started"]
+
+def _schema():
+    return {
+        "numbers": number_fields,
+        "texts": text_fields,
+        "skills": SkillStats.labels,
+        "activities": ActivityStats.labels,
+        "notify_stats": NotifyStats.labels
+    }
+
+def is_binary_memberlist(data):
+    """
+    True if data (bytes) starts like a binary memberlist file.
+    """
+    return data[:len(magic)] == magic
+
+def _numbers(memb):
+    if memb.last_active is None:
+        last_active = _no_date
+    else:
+        last_active = (memb.last_active - _epoch).days
+    return [
+        memb.clan_xp,
+        memb.kills,
+        memb.discord_id,
+        memb.id,
+        memb.entry_id,
+        memb.warning_points,
+        int(memb.passed_gem),
+        last_active,
+        memb.misc["events_started"]
+    ]
+
+def _texts(memb):
+    texts = [
+        memb.name,
+        memb.rank,
+        memb.discord_rank,
+        memb.site_rank,
+        memb.join_date,
+        memb.profile_link,
+        memb.leave_date,
+        memb.leave_reason,
+        memb.referral,
+        memb.discord_name,
+        ",".join(memb.old_names),
+        "[" + "".join(str(w) for w in memb.warnings) + "]",
+        memb.note1,
+        memb.note2,
+        memb.note3
+    ]
+    for label in text_fields[len(texts):]:
+        texts.append(str(memb.misc[label]))
+    return "\t".join(texts)
+
+def memberlist_to_bytes(memberlist):
+    """
+    Writes a memberlist to bytes in the binary format.
+    """
+    schema = json.dumps(_schema()).encode("utf-8")
+    numbers = array("q")
+    texts = list()
+    for memb in memberlist:
+        numbers.extend(_numbers(memb))
+        numbers.extend(memb.skills.data)
+        numbers.extend(memb.activities.data)
+        numbers.extend(memb.notify_stats.data)
+        texts.append(_texts(memb))
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    body = numbers.tobytes() + "\n".join(texts).encode("utf-8")
+    return b"".join([
+        _header.pack(magic, version, len(memberlist), len(schema)),
+        schema,
+        # fastest level, higher levels barely make it smaller
+        zlib.compress(body, 1)
+    ])
+
+def _positions(stored, labels):
+    """
+    Position of each label in the stored labels, None if it was not stored.
+    """
+    index = {label: num for num, label in enumerate(stored)}
+    return [index.get(label) for label in labels]
+
+class _BlockReader:
+    """
+    Reads one type of stat block from the number rows of a file.
+    """
+    def __init__(self, block_type, stored_labels, offset):
+        self.block_type = block_type
+        self.size = block_type._size()
+        self.offset = offset
+        self.width = len(stored_labels) * self.size
+        # same labels as now, can just copy the stored values
+        self.same = list(stored_labels) == list(block_type.labels)
+        self.positions = _positions(stored_labels, block_type.labels)
+    def read(self, numbers, row_start):
+        block = self.block_type.__new__(self.block_type)
+        start = row_start + self.offset
+        if self.same:
+            block.data = numbers[start:start+self.width]
+            return block
+        block.data = array("q", bytes(8 * len(block.labels) * self.size))
+        for num, pos in enumerate(self.positions):
+            if pos is None:
+                continue
+            src = start + pos * self.size
+            dst = num * self.size
+            block.data[dst:dst+self.size] = numbers[src:src+self.size]
+        return block
+
+def memberlist_from_bytes(data):
+    """
+    Reads a memberlist from bytes in the binary format.
+    """
+    file_magic, file_version, count, schema_len = _header.unpack_from(data)
+    if file_magic != magic:
+        raise ValueError("Not a binary memberlist file")
+    if file_version > version:
+        raise ValueError(
+            f"Memberlist file version {file_version} is newer than this "
+            f"version of the bot can read ({version})"
+        )
+    pos = _header.size
+    schema = json.loads(data[pos:pos+schema_len].decode("utf-8"))
+    pos += schema_len
+
+    stored_numbers = schema["numbers"]
+    readers = list()
+    offset = len(stored_numbers)
+    for key, block_type in [
+        ("skills", SkillStats),
+        ("activities", ActivityStats),
+        ("notify_stats", NotifyStats)
+    ]:
+        reader = _BlockReader(block_type, schema[key], offset)
+        readers.append(reader)
+        offset += reader.width
+    row_width = offset
+
+    body = zlib.decompress(data[pos:])
+    numbers_len = 8 * row_width * count
+    numbers = array("q")
+    numbers.frombytes(body[:numbers_len])
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    lines = body[numbers_len:].decode("utf-8").split("\n") if count > 0 else []
+
+    number_pos = _positions(stored_numbers, number_fields)
+    text_pos = _positions(schema["texts"], text_fields)
+    result = list()
+    for i in range(count):
+        row = i * row_width
+        nums = [
+            0 if p is None else numbers[row + p] for p in number_pos
+        ]
+        stored_texts = lines[i].split("\t")
+        texts = ["" if p is None else stored_texts[p] for p in text_pos]
+        memb = Member(texts[0], texts[1], nums[0], nums[1])
+        memb.discord_rank = texts[2]
+        memb.site_rank = texts[3]
+        memb.join_date = texts[4]
+        memb.profile_link = texts[5]
+        memb.leave_date = texts[6]
+        memb.leave_reason = texts[7]
+        memb.referral = texts[8]
+        memb.discord_name = texts[9]
+        if texts[10] == "":
+            memb.old_names = list()
+        else:
+            memb.old_names = texts[10].split(",")
+        memb.warnings = _parse_warnings(texts[11] or "[]")
+        memb.note1 = texts[12]
+        memb.note2 = texts[13]
+        memb.note3 = texts[14]
+        for num, label in enumerate(text_fields[15:]):
+            memb.misc[label] = texts[15 + num]
+        memb.misc["discord_roles"] = _parse_str_list(
+            memb.misc["discord_roles"] or "[]"
+        )
+        memb.discord_id = nums[2]
+        memb.id = nums[3]
+        memb.entry_id = nums[4]
+        memb.warning_points = nums[5]
+        memb.passed_gem = nums[6] == 1
+        if nums[7] == _no_date or number_pos[7] is None:
+            memb.last_active = None
+        else:
+            memb.last_active = _epoch + timedelta(days=nums[7])
+        memb.misc["events_started"] = nums[8]
+        memb.skills = readers[0].read(numbers, row)
+        memb.activities = readers[1].read(numbers, row)
+        memb.notify_stats = readers[2].read(numbers, row)
+        result.append(memb)
+    return result
@@ -0,0 +1,313 @@
+"""
+Optional SQLite copy of the memberlists, kept next to the memberlist files.
+
+The bot writes every change of the memberlists to the database as well, as
+row updates of only the members that changed. memberlist_lookup reads from
+the database when it is enabled: lookups by name, old name, discord id,
+profile link, id or entry id are indexed queries instead of reading and
+scanning a whole list. The database runs in WAL mode, readers see the last
+stored version of the lists while an update is writing.
+
+The memberlist files and journal stay the primary storage. The bot loads
+them at start and syncs the database from them. Each list in the database
+keeps the storage stamp (memberlist.storage_stamp) of the files it was
+synced from, lookups only use the database while that still matches. After
+a crash between writing the files and the database, or after running with
+the database turned off, lookups read the files until the next sync.
+
+Tables:
+ - members: a row per member per list, with its full memberlist line and
+   the columns it can be looked up by.
+ - old_names, warnings: a row per old name / warning of a member.
+ - stat_snapshots: stats of all current members, one set per daily update.
+"""
+import os
+import sqlite3
+import threading
+from member import (
+    Member,
+    valid_discord_id,
+    valid_profile_link,
+    _parse_warnings
+)
+from memberlist_events import _keyed
+from memberlist_schema import line_version
+from utilities import int_0
+
+_schema = """
+CREATE TABLE IF NOT EXISTS lists (
+    list TEXT PRIMARY KEY,
+    stamp TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS members (
+    list TEXT NOT NULL,
+    key TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    discord_id INTEGER NOT NULL,
+    profile_link TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    entry_id INTEGER NOT NULL,
+    line TEXT NOT NULL,
+    PRIMARY KEY (list, key)
+);
+CREATE INDEX IF NOT EXISTS members_pos ON members (list, pos);
+CREATE INDEX IF NOT EXISTS members_name ON members (list, name_lower);
+CREATE INDEX IF NOT EXISTS members_discord_id ON members (list, discord_id);
+CREATE INDEX IF NOT EXISTS members_profile_link ON members (list, profile_link);
+CREATE INDEX IF NOT EXISTS members_id ON members (list, id);
+CREATE INDEX IF NOT EXISTS members_entry_id ON members (list, entry_id);
+CREATE TABLE IF NOT EXISTS old_names (
+    list TEXT NOT NULL,
+    key TEXT NOT NULL,
+    name_lower TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS old_names_name ON old_names (list, name_lower);
+CREATE INDEX IF NOT EXISTS old_names_member ON old_names (list, key);
+CREATE TABLE IF NOT EXISTS warnings (
+    list TEXT NOT NULL,
+    key TEXT NOT NULL,
+    num INTEGER NOT NULL,
+    warning TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS warnings_member ON warnings (list, key);
+CREATE TABLE IF NOT EXISTS stat_snapshots (
+    date TEXT NOT NULL,
+    entry_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    clan_xp INTEGER NOT NULL,
+    kills INTEGER NOT NULL,
+    skills TEXT NOT NULL,
+    activities TEXT NOT NULL,
+    notify_stats TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stat_snapshots_date ON stat_snapshots (date);
+CREATE INDEX IF NOT EXISTS stat_snapshots_member
+    ON stat_snapshots (entry_id, date);
+"""
+
+# types of ids get() can look up, the same as memberlist_get
+_lookup_columns = [
+    "discord_id", "profile_link", "name_lower", "name", "id", "entry_id"
+]
+
+def _list_key(filename):
+    return os.path.normpath(filename)
+
+def _member_row(list_name, key, pos, line):
+    cols = line.split("\t")
+    return (
+        list_name, key, pos, cols[0], cols[0].lower(), int_0(cols[10]),
+        cols[6], int_0(cols[14]), int_0(cols[15]), line
+    )
+
+class MemberlistDB:
+    """
+    MemberlistDB(filename), lists are identified by their memberlist filename.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        dirname = os.path.dirname(filename)
+        if (dirname != ''):
+            os.makedirs(dirname, exist_ok=True)
+        # only used for writing, by one thread at a time
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_schema)
+        columns = [
+            row[1] for row in self._conn.execute("PRAGMA table_info(lists)")
+        ]
+        if "stamp" not in columns:
+            # databases from before stamps, never current until synced
+            self._conn.execute(
+                "ALTER TABLE lists ADD COLUMN stamp TEXT NOT NULL DEFAULT ''"
+            )
+        # lines of another version of the line layout, dropped so the lists
+        # are read from their files until the next sync writes them again
+        user_version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if user_version != line_version:
+            with self._conn:
+                for table in ["lists", "members", "old_names", "warnings"]:
+                    self._conn.execute(f"DELETE FROM {table}")
+            self._conn.execute(f"PRAGMA user_version = {line_version}")
+        self._lock = threading.Lock()
+        # list -> {key: line} and {key: pos}, as stored in the database now
+        self._lines = dict()
+        self._positions = dict()
+    def _read(self):
+        """
+        New connection for reading, sees the last committed version.
+        """
+        return sqlite3.connect(self.filename)
+    def _stored(self, list_name):
+        if list_name not in self._lines:
+            lines = dict()
+            positions = dict()
+            rows = self._conn.execute(
+                "SELECT key, pos, line FROM members WHERE list = ?",
+                (list_name,)
+            )
+            for key, pos, line in rows:
+                lines[key] = line
+                positions[key] = pos
+            self._lines[list_name] = lines
+            self._positions[list_name] = positions
+        return self._lines[list_name], self._positions[list_name]
+    def sync(self, lists, stamps=None):
+        """
+        Updates the database to lists, a dictionary of filename -> member
+        lines. Only writes the members that changed. Returns the number of
+        members written.
+        stamps: dictionary of filename -> storage stamp of the files the
+        lines were stored in, lists without one are never current.
+        """
+        if stamps is None:
+            stamps = dict()
+        written = 0
+        # only kept once the transaction is committed
+        stored_lines = dict()
+        stored_positions = dict()
+        with self._lock, self._conn:
+            for filename, lines in lists.items():
+                list_name = _list_key(filename)
+                old_lines, old_positions = self._stored(list_name)
+                new_lines = _keyed(lines)
+                new_positions = {key: pos for pos, key in enumerate(new_lines)}
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO lists VALUES (?, ?)",
+                    (list_name, stamps.get(filename, ""))
+                )
+                removed = [
+                    (list_name, key) for key in old_lines if key not in new_lines
+                ]
+                changed = [
+                    (key, line) for key, line in new_lines.items()
+                    if old_lines.get(key) != line
+                ]
+                moved = [
+                    (pos, list_name, key) for key, pos in new_positions.items()
+                    if key in old_lines and old_lines[key] == new_lines[key]
+                    and old_positions[key] != pos
+                ]
+                for table in ["members", "old_names", "warnings"]:
+                    self._conn.executemany(
+                        f"DELETE FROM {table} WHERE list = ? AND key = ?",
+                        removed + [(list_name, key) for key, _ in changed]
+                    )
+                self._conn.executemany(
+                    "INSERT INTO members VALUES (?,?,?,?,?,?,?,?,?,?)",
+                    [
+                        _member_row(list_name, key, new_positions[key], line)
+                        for key, line in changed
+                    ]
+                )
+                self._conn.executemany(
+                    "UPDATE members SET pos = ? WHERE list = ? AND key = ?",
+                    moved
+                )
+                old_names = []
+                warnings = []
+                for key, line in changed:
+                    cols = line.split("\t")
+                    for name in cols[12].split(","):
+                        if name != "":
+                            old_names.append((list_name, key, name.lower()))
+                    for num, warning in enumerate(_parse_warnings(cols[17])):
+                        warnings.append((list_name, key, num, str(warning)))
+                self._conn.executemany(
+                    "INSERT INTO old_names VALUES (?,?,?)", old_names
+                )
+                self._conn.executemany(
+                    "INSERT INTO warnings VALUES (?,?,?,?)", warnings
+                )
+                stored_lines[list_name] = new_lines
+                stored_positions[list_name] = new_positions
+                written += len(removed) + len(changed) + len(moved)
+        self._lines.update(stored_lines)
+        self._positions.update(stored_positions)
+        return written
+    def snapshot_stats(self, date_str, lines):
+        """
+        Stores the stats of the member lines in lines for date_str, replaces
+        any stats already stored for that date.
+        """
+        rows = []
+        for line in lines:
+            cols = line.split("\t")
+            rows.append((
+                date_str, int_0(cols[15]), cols[0], int_0(cols[21]),
+                int_0(cols[22]), cols[23], cols[24], cols[25]
+            ))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM stat_snapshots WHERE date = ?", (date_str,)
+            )
+            self._conn.executemany(
+                "INSERT INTO stat_snapshots VALUES (?,?,?,?,?,?,?,?)", rows
+            )
+    def is_current(self, filename, stamp):
+        """
+        True if the list of filename was last synced from the files with 
+        this storage stamp.
+        """
+        conn = self._read()
+        try:
+            row = conn.execute(
+                "SELECT stamp FROM lists WHERE list = ?", (_list_key(filename),)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row is not None and row[0] != "" and row[0] == stamp
+    def get(self, filename, id, type=None):
+        """
+        Same as memberlist_get on the memberlist of filename, as a query.
+        """
+        if type is None:
+            if valid_discord_id(id):
+                type = "discord_id"
+            elif valid_profile_link(id):
+                type = "profile_link"
+            elif isinstance(id, str):
+                type = "name_lower"
+                id = id.lower()
+            else:
+                return None
+        if type not in _lookup_columns:
+            return None
+        column = type
+        if type == "name":
+            # case sensitive, uses the lowercase index then checks the case
+            column = "name_lower"
+        conn = self._read()
+        try:
+            # sorted here, ORDER BY pos makes sqlite pick the pos index
+            rows = conn.execute(
+                f"SELECT pos, name, line FROM members WHERE list = ? "
+                f"AND {column} = ?",
+                (_list_key(filename), id.lower() if type == "name" else id)
+            ).fetchall()
+        finally:
+            conn.close()
+        for _, name, line in sorted(rows):
+            if type != "name" or name == id:
+                return Member.from_string(line)
+        return None
+    def get_by_old_name(self, filename, name):
+        """
+        Members of the memberlist of filename that had name as old name.
+        """
+        conn = self._read()
+        try:
+            rows = conn.execute(
+                "SELECT members.pos, members.line FROM old_names JOIN members "
+                "ON old_names.list = members.list AND old_names.key = members.key "
+                "WHERE old_names.list = ? AND old_names.name_lower = ?",
+                (_list_key(filename), name.lower())
+            ).fetchall()
+        finally:
+            conn.close()
+        return [Member.from_string(line) for _, line in sorted(rows)]
+    def close(self):
+        self._conn.close()
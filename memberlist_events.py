@@ -0,0 +1,305 @@
+"""
+Event log of all changes to the memberlists, to look back at the clan as it
+was on any date without needing a full copy of the lists for every day.
+
+Changes are stored as events, a json line each:
+    {"time": ..., "type": ..., "list": ..., "key": ..., ...}
+list is current_members, old_members or banned_members, and key identifies
+the member entry in it (its entry_id). The types are:
+ - join: member added to the list, with its full line.
+ - leave: member removed from the list. Moving a member to another list is
+   a leave from one and a join to the other.
+ - rename, rank, stats, note, hosts, edit: changed columns of a member, in
+   fields as column number -> new value. edit is anything not in the others.
+
+Every few days a snapshot of the full lists is written, and the events after
+it go in a new events file. A state is rebuilt from the last snapshot before
+it plus the events after that snapshot. Snapshots have the version of the
+line layout (see memberlist_schema), the events after a snapshot are in the
+same version. Snapshots and events older than keep_days are removed by prune,
+except the last snapshot before that so the full keep_days can be rebuilt.
+
+    memberlists/events/snapshot_<time>.json
+    memberlists/events/events_<time>.log
+"""
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+import utilities
+from member import Member
+from memberlist_schema import line_version, headerless_version, upgrade_lines
+
+event_types = [
+    "join", "leave", "rename", "rank", "stats", "note", "hosts", "edit"
+]
+# columns of a memberlist line that each type of change is about
+_event_columns = {
+    "rename": [0, 12],
+    "rank": [1, 2, 3],
+    "stats": [13, 21, 22, 23, 24],
+    "note": [16, 17, 18, 19, 20],
+    "hosts": [25]
+}
+_column_types = dict()
+for _type, _columns in _event_columns.items():
+    for _column in _columns:
+        _column_types[_column] = _type
+# column of the entry_id in a memberlist line
+_entry_id_column = 15
+# fixed instead of utilities.datetimeformat, times are compared as text
+_timeformat = "%Y-%m-%d_%H.%M.%S"
+
+def _keyed(lines):
+    """
+    Dictionary of key -> line for the lines of a memberlist. The key is the
+    entry_id, with a #number added for repeats of the same entry_id.
+    """
+    result = dict()
+    for line in lines:
+        key = line.split("\t", _entry_id_column + 1)[_entry_id_column]
+        if key in result:
+            num = 2
+            while f"{key}#{num}" in result:
+                num += 1
+            key = f"{key}#{num}"
+        result[key] = line
+    return result
+
+def _changes(old_line, line):
+    """
+    Returns type -> {column: value} for the columns that changed.
+    """
+    old_cols = old_line.split("\t")
+    cols = line.split("\t")
+    changes = dict()
+    for num, value in enumerate(cols):
+        if num < len(old_cols) and old_cols[num] == value:
+            continue
+        event_type = _column_types.get(num, "edit")
+        changes.setdefault(event_type, dict())[str(num)] = value
+    return changes
+
+def _apply(state, event):
+    """
+    Applies an event to state, list name -> {key: line}.
+    """
+    mlist = state.setdefault(event["list"], dict())
+    key = event["key"]
+    if event["type"] == "join":
+        mlist[key] = event["line"]
+        return
+    if event["type"] == "leave":
+        mlist.pop(key, None)
+        return
+    if key not in mlist:
+        return
+    cols = mlist[key].split("\t")
+    for num, value in event["fields"].items():
+        num = int(num)
+        while len(cols) <= num:
+            cols.append("")
+        cols[num] = value
+    mlist[key] = "\t".join(cols)
+
+def _upgrade_state(state, version):
+    """
+    state with its lines upgraded from version to the current version.
+    """
+    return {
+        name: _keyed(upgrade_lines(mlist.values(), version))
+        for name, mlist in state.items()
+    }
+
+class EventLog:
+    """
+    EventLog(folder, snapshot_days, keep_days), snapshot_days is the minimum
+    number of days between snapshots. keep_days is how long to keep them, 0
+    to keep everything.
+    """
+    def __init__(self, folder, snapshot_days=7, keep_days=0):
+        self.folder = folder
+        self.snapshot_days = snapshot_days
+        self.keep_days = keep_days
+        # list name -> {key: line}, the lists as the log has them now
+        self._state = None
+        self._snapshot_time = None
+        # list name -> member lines last recorded, to skip unchanged lists
+        self._lines = dict()
+        # record, snapshot and prune run in executor threads of the bot
+        self._lock = threading.Lock()
+    def _snapshot_times(self):
+        """
+        Times of all the snapshots, oldest first.
+        """
+        if not os.path.isdir(self.folder):
+            return []
+        times = []
+        for file in os.listdir(self.folder):
+            if file.startswith("snapshot_") and file.endswith(".json"):
+                times.append(file[len("snapshot_"):-len(".json")])
+        return sorted(times)
+    def _snapshot_filename(self, time):
+        return os.path.join(self.folder, f"snapshot_{time}.json")
+    def _events_filename(self, time):
+        return os.path.join(self.folder, f"events_{time}.log")
+    def _read_snapshot(self, time):
+        """
+        Returns the state of the snapshot at time and its version.
+        """
+        text = utilities.read_file(self._snapshot_filename(time), create=False)
+        data = json.loads(text)
+        state = {
+            name: _keyed(lines) for name, lines in data["lists"].items()
+        }
+        return state, data.get("version", headerless_version)
+    def _read_events(self, time):
+        """
+        Events after the snapshot at time. Skips a damaged last line from a
+        crash during an append.
+        """
+        filename = self._events_filename(time)
+        if not os.path.exists(filename):
+            return
+        with open(filename, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    def start(self, lists):
+        """
+        Loads the current state of the log, and records how lists differ
+        from it, for example from edits made while the log was disabled.
+        lists is a dictionary of list name -> member lines.
+        """
+        times = self._snapshot_times()
+        if len(times) == 0:
+            self.snapshot(lists)
+            return
+        self._snapshot_time = times[-1]
+        self._state, version = self._read_snapshot(self._snapshot_time)
+        for event in self._read_events(self._snapshot_time):
+            _apply(self._state, event)
+        if version != line_version:
+            # new events have to go after a snapshot in the current version
+            self._state = _upgrade_state(self._state, version)
+            self.snapshot()
+        self.record(lists)
+    def record(self, lists):
+        """
+        Appends the events that turn the logged state into lists, a
+        dictionary of list name -> member lines. Returns the number of events.
+        """
+        with self._lock:
+            time = datetime.utcnow().strftime(_timeformat)
+            events = []
+            for name, lines in lists.items():
+                if self._lines.get(name) == lines:
+                    continue
+                self._lines[name] = lines
+                old = self._state.get(name, dict())
+                new = _keyed(lines)
+                for key, line in old.items():
+                    if key not in new:
+                        events.append({
+                            "time": time, "type": "leave", "list": name,
+                            "key": key
+                        })
+                for key, line in new.items():
+                    old_line = old.get(key)
+                    if old_line is None:
+                        events.append({
+                            "time": time, "type": "join", "list": name,
+                            "key": key, "line": line
+                        })
+                        continue
+                    if old_line == line:
+                        continue
+                    for event_type, fields in _changes(old_line, line).items():
+                        events.append({
+                            "time": time, "type": event_type, "list": name,
+                            "key": key, "fields": fields
+                        })
+                self._state[name] = new
+            if len(events) == 0:
+                return 0
+            filename = self._events_filename(self._snapshot_time)
+            with open(filename, "a", encoding="utf-8") as file:
+                file.write("".join(json.dumps(e) + "\n" for e in events))
+                file.flush()
+                os.fsync(file.fileno())
+            return len(events)
+    def snapshot(self, lists=None):
+        """
+        Writes a snapshot of lists (list name -> member lines), or of the
+        current state if not given, and starts a new events file after it.
+        """
+        with self._lock:
+            if lists is None:
+                lists = {
+                    name: list(mlist.values())
+                    for name, mlist in self._state.items()
+                }
+            else:
+                self._lines = dict(lists)
+            time = datetime.utcnow().strftime(_timeformat)
+            utilities.write_file_atomic(
+                json.dumps(
+                    {"time": time, "version": line_version, "lists": lists}
+                ),
+                self._snapshot_filename(time)
+            )
+            self._snapshot_time = time
+            self._state = {name: _keyed(lines) for name, lines in lists.items()}
+    def prune(self):
+        """
+        Removes the snapshots and events files older than keep_days. Keeps
+        the last snapshot before that, state_at needs it for the dates right
+        after. Returns the number of removed snapshots.
+        """
+        with self._lock:
+            if not self.keep_days or not os.path.isdir(self.folder):
+                return 0
+            cutoff = datetime.utcnow() - timedelta(days=self.keep_days)
+            cutoff = cutoff.strftime(_timeformat)
+            old = [t for t in self._snapshot_times() if t < cutoff]
+            # never the snapshot new events are appended after
+            old = [t for t in old[:-1] if t != self._snapshot_time]
+            for time in old:
+                # snapshot first, events without a snapshot are never read
+                os.remove(self._snapshot_filename(time))
+            kept = set(self._snapshot_times())
+            for file in os.listdir(self.folder):
+                if not (file.startswith("events_") and file.endswith(".log")):
+                    continue
+                time = file[len("events_"):-len(".log")]
+                if time < cutoff and time not in kept:
+                    os.remove(os.path.join(self.folder, file))
+            return len(old)
+    def snapshot_due(self):
+        if self._snapshot_time is None:
+            return True
+        last = datetime.strptime(self._snapshot_time, _timeformat)
+        return (datetime.utcnow() - last).days >= self.snapshot_days
+    def state_at(self, date):
+        """
+        Rebuilds the memberlists as they were right before date. Returns a
+        dictionary of list name -> list of Members, None if the log does not
+        go back that far. The order of members in the lists can differ from
+        the real lists at the time.
+        """
+        time = date.strftime(_timeformat)
+        times = [t for t in self._snapshot_times() if t < time]
+        if len(times) == 0:
+            return None
+        state, version = self._read_snapshot(times[-1])
+        for event in self._read_events(times[-1]):
+            if event["time"] >= time:
+                break
+            _apply(state, event)
+        state = _upgrade_state(state, version)
+        return {
+            name: [Member.from_string(line) for line in mlist.values()]
+            for name, mlist in state.items()
+        }
@@ -0,0 +1,157 @@
+"""
+Journal of the edits made to the memberlists between lock() and unlock().
+
+Rewriting all three memberlists on every unlock is a lot of writing for what
+is usually one changed member, like a host count going up. Instead unlock()
+appends the changed member lines to this journal, a few hundred bytes. When
+the journal grows too large, or too much changed at once, the full lists are
+written again and the journal starts over.
+
+memberlist_from_disk applies the journal to the lists it reads, so readers
+always see the latest edits, and a restarted bot continues where it was.
+
+Each line of the journal is the json of the changes made by one unlock:
+    {"time": ..., "lists": {filename: {"base": crc, "changes": [...]}}}
+base is the crc32 of the list lines before the changes, changes is a list of
+[start, end, lines] that replace lines[start:end] of the list. The base
+makes replaying safe: changes that were already written to the full lists
+before a crash no longer match and are skipped.
+"""
+import json
+import os
+import zlib
+from datetime import datetime
+import utilities
+
+def _crc(lines):
+    return zlib.crc32("\n".join(lines).encode("utf-8"))
+
+def _key(filename):
+    return os.path.normpath(filename)
+
+def _diff(old, new):
+    """
+    Returns the changes that turn the lines in old into new. Lists of the
+    same length are compared line by line, edits of members in place.
+    Otherwise all lines between the unchanged start and end are replaced.
+    """
+    if len(old) == len(new):
+        return [
+            [num, num+1, [line]]
+            for num, (old_line, line) in enumerate(zip(old, new))
+            if old_line != line
+        ]
+    start = 0
+    while start < len(old) and start < len(new) and old[start] == new[start]:
+        start += 1
+    end_old = len(old)
+    end_new = len(new)
+    while (
+        end_old > start and end_new > start
+        and old[end_old-1] == new[end_new-1]
+    ):
+        end_old -= 1
+        end_new -= 1
+    return [[start, end_old, new[start:end_new]]]
+
+class MemberlistJournal:
+    """
+    MemberlistJournal(filename, max_size, max_lines).
+    max_size - size in bytes after which the journal is compacted.
+    max_lines - most changed member lines to journal for a single unlock,
+        more than this is written as full lists instead.
+    """
+    def __init__(self, filename, max_size=1024*1024, max_lines=200):
+        self.filename = filename
+        self.max_size = max_size
+        self.max_lines = max_lines
+        # list filename -> member lines as they are stored on disk now
+        self._stored = dict()
+    def read(self):
+        """
+        Returns the journal entries. Skips a damaged last line from a crash
+        during an append.
+        """
+        if not os.path.exists(self.filename):
+            return []
+        entries = []
+        text = utilities.read_file(self.filename, create=False)
+        for line in text.splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return entries
+    def apply(self, entries, list_filename, lines):
+        """
+        Applies the changes to list_filename in entries to its lines, in
+        place. Returns the number of changes applied.
+        """
+        key = _key(list_filename)
+        crc = None
+        applied = 0
+        for entry in entries:
+            changed = entry["lists"].get(key)
+            if changed is None:
+                continue
+            if crc is None:
+                crc = _crc(lines)
+            if changed["base"] != crc:
+                continue
+            for start, end, new_lines in changed["changes"]:
+                lines[start:end] = new_lines
+                applied += 1
+            crc = _crc(lines)
+        return applied
+    def record(self, lists):
+        """
+        Appends the changes in lists, a dictionary of filename -> member
+        lines, since they were last stored. Returns False if the changes are
+        too large to journal, the full lists need to be written followed by
+        reset() instead.
+        """
+        entry = dict()
+        changed_lines = 0
+        new_stored = dict()
+        for list_filename, lines in lists.items():
+            key = _key(list_filename)
+            old = self._stored.get(key)
+            if old is None:
+                return False
+            changes = _diff(old, lines)
+            if len(changes) == 0:
+                continue
+            changed_lines += sum(len(change[2]) for change in changes)
+            entry[key] = {"base": _crc(old), "changes": changes}
+            new_stored[key] = lines
+        if len(entry) == 0:
+            return True
+        if changed_lines > self.max_lines or self._size() > self.max_size:
+            return False
+        line = json.dumps({
+            "time": datetime.utcnow().strftime(utilities.datetimeformat),
+            "lists": entry
+        })
+        dirname = os.path.dirname(self.filename)
+        if (dirname != ''):
+            os.makedirs(dirname, exist_ok=True)
+        with open(self.filename, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self._stored.update(new_stored)
+        return True
+    def reset(self, lists):
+        """
+        Starts an empty journal, call after writing the full lists to disk.
+        lists is a dictionary of filename -> member lines.
+        """
+        self._stored = {
+            _key(list_filename): list(lines)
+            for list_filename, lines in lists.items()
+        }
+        utilities.write_file_atomic("", self.filename)
+    def _size(self):
+        if not os.path.exists(self.filename):
+            return 0
+        return os.path.getsize(self.filename)
@@ -0,0 +1,111 @@
+"""
+Versions of the memberlist line layout, the tab separated columns of a
+member in a text memberlist file.
+
+Text memberlist files start with a header line with the version of the
+layout their lines are in:
+    #memberlist <version>
+Files from before the header was added have none, they are version 2.
+Member names can't start with a #, so the header can't be a member.
+
+Changing the layout means adding one to line_version and registering an
+upgrade from the previous version, a function that takes the columns of a
+line in that version and returns them in the next:
+
+    @upgrade(2)
+    def _add_something(cols):
+        cols.insert(26, "")
+        return cols
+
+Files in an older version are upgraded as they are read, and
+migrate_memberlists.py rewrites them all in the current version.
+"""
+
+# version of the memberlist line layout written by this version of the bot.
+line_version = 2
+# version of text files without a header line.
+headerless_version = 2
+header_prefix = "#memberlist "
+
+# version -> function upgrading the columns of a line from that version
+_upgrades = dict()
+
+def upgrade(from_version):
+    """
+    Registers the decorated function as the upgrade of the columns of a line
+    from from_version to from_version + 1.
+    """
+    def register(func):
+        _upgrades[from_version] = func
+        return func
+    return register
+
+@upgrade(1)
+def _add_entry_id(cols):
+    """
+    Version 2 added the entry_id after the id, unknown for older entries.
+    """
+    cols.insert(15, "0")
+    return cols
+
+def header_line(version=line_version):
+    return f"{header_prefix}{version}"
+
+def read_header(line):
+    """
+    Version in a header line, None if line is not a header.
+    """
+    if not line.startswith(header_prefix):
+        return None
+    return int(line[len(header_prefix):].strip())
+
+def check_version(version):
+    """
+    Raises a ValueError if lines of version can't be upgraded to the current
+    version.
+    """
+    if version > line_version:
+        raise ValueError(
+            f"Memberlist version {version} is newer than this version of the "
+            f"bot can read ({line_version})"
+        )
+    for num in range(version, line_version):
+        if num not in _upgrades:
+            raise ValueError(f"No upgrade for memberlist version {num}")
+
+def upgrade_line(line, version, to_version=line_version):
+    """
+    A memberlist line of version in to_version, the current version if not
+    given.
+    """
+    if version == to_version:
+        return line
+    cols = line.split("\t")
+    for num in range(version, to_version):
+        cols = _upgrades[num](cols)
+    return "\t".join(cols)
+
+def upgrade_lines(lines, version, to_version=line_version):
+    """
+    Generator of the memberlist lines of version in to_version, the current
+    version if not given. lines can be any iterable of lines, like an open
+    file, so a file does not need to be read all at once.
+    """
+    check_version(version)
+    if version == to_version:
+        yield from lines
+        return
+    for line in lines:
+        yield upgrade_line(line, version, to_version)
+
+def split_header(lines):
+    """
+    Removes the header from lines (a list) if there is one. Returns the
+    version of the lines.
+    """
+    if len(lines) > 0:
+        version = read_header(lines[0])
+        if version is not None:
+            del lines[0]
+            return version
+    return headerless_version
@@ -0,0 +1,119 @@
+"""
+Columnar copy of a memberlist, for queries over the whole clan like top 10s
+and inactivity checks. Each stat is a numpy array with a row per member, so
+these run as array operations instead of loops over member objects.
+
+The table is a read only snapshot, build a new one after the list changes.
+"""
+from datetime import datetime
+import numpy
+from member import (
+    skill_labels,
+    activity_labels,
+    notify_role_names,
+    SkillStats,
+    ActivityStats
+)
+
+_epoch = datetime(1970, 1, 1)
+_clue_labels = [
+    "easy_clues", "medium_clues", "hard_clues", "elite_clues", "master_clues"
+]
+
+def epoch_days(date):
+    """
+    Days since 1970-01-01 for a datetime, nan for None.
+    """
+    if date is None:
+        return numpy.nan
+    return (date - _epoch).days
+
+def _stack(blocks, shape):
+    """
+    Stacks the arrays of some stat blocks into one numpy array of shape.
+    """
+    data = b"".join(block.data.tobytes() for block in blocks)
+    return numpy.frombuffer(data, dtype=numpy.int64).reshape(shape)
+
+class MemberTable:
+    """
+    MemberTable(memberlist), columns:
+
+    name, rank, discord_rank - string columns (numpy object arrays).
+    clan_xp, kills - int columns.
+    skills - [member, skill, (rank, xp, level)], indexed as in skill_labels.
+    activities - [member, activity, (rank, score)], as in activity_labels.
+    notify_stats - [member, role], as in notify_role_names.
+    last_active - days since 1970-01-01, nan if not known.
+    """
+    def __init__(self, memberlist):
+        self.members = list(memberlist)
+        count = len(self.members)
+        self.name = numpy.array([m.name for m in self.members], dtype=object)
+        self.rank = numpy.array([m.rank for m in self.members], dtype=object)
+        self.discord_rank = numpy.array(
+            [m.discord_rank for m in self.members], dtype=object
+        )
+        self.clan_xp = numpy.fromiter(
+            (m.clan_xp for m in self.members), dtype=numpy.int64, count=count
+        )
+        self.kills = numpy.fromiter(
+            (m.kills for m in self.members), dtype=numpy.int64, count=count
+        )
+        self.skills = _stack(
+            (m.skills for m in self.members),
+            (count, len(skill_labels), SkillStats.width)
+        )
+        self.activities = _stack(
+            (m.activities for m in self.members),
+            (count, len(activity_labels), ActivityStats.width)
+        )
+        self.notify_stats = _stack(
+            (m.notify_stats for m in self.members),
+            (count, len(notify_role_names))
+        )
+        self.last_active = numpy.fromiter(
+            (epoch_days(m.last_active) for m in self.members),
+            dtype=numpy.float64,
+            count=count
+        )
+    def __len__(self):
+        return len(self.members)
+    def skill(self, label, num=1):
+        """
+        Column of one skill, num 0 = rank, 1 = xp, 2 = level.
+        """
+        return self.skills[:, skill_labels.index(label), num]
+    def activity(self, label, num=1):
+        """
+        Column of one activity, num 0 = rank, 1 = score.
+        """
+        return self.activities[:, activity_labels.index(label), num]
+    def total_clues(self):
+        return sum(self.activity(label) for label in _clue_labels)
+    def hosts(self):
+        """
+        Total events hosted per member, the sum of their notify stats.
+        """
+        return self.notify_stats.sum(axis=1)
+    def top(self, values, count=10, asc=False):
+        """
+        Rows of the count members with the highest values (lowest if asc).
+        Keeps list order for equal values.
+        """
+        if asc:
+            order = numpy.argsort(values, kind="stable")
+        else:
+            order = numpy.argsort(-values, kind="stable")
+        return order[:count]
+    def rows_in(self, column, values):
+        """
+        Mask of the rows where column is one of values.
+        """
+        return numpy.isin(column, list(values))
+    def take(self, rows):
+        """
+        Returns the member objects for rows (indices or a mask).
+        """
+        rows = numpy.arange(len(self.members))[rows]
+        return [self.members[row] for row in rows]
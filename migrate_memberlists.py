@@ -0,0 +1,220 @@
+# Rewrites all memberlist files below in the current version of the member
+# line layout (see memberlist_schema), run from the bot folder while the bot
+# is not running:
+#   python migrate_memberlists.py               upgrades all files
+#   python migrate_memberlists.py --from 1      files without a header line
+#                                               are in version 1
+#   python migrate_memberlists.py --workers 4   number of processes to use
+# Text files are upgraded a line at a time without reading them into memory,
+# binary files are rewritten in the current binary format. Files already in
+# the current version are left alone. The files in the folders are done in
+# parallel by a pool of processes. Each file is written to a temporary file
+# first, and only replaces the old file once all of its members read fine.
+# Edits in the memberlist journal are written into the main lists first.
+#
+# The memberlist archive, event log and database upgrade their own lines
+# when they are read, they don't need to be migrated.
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import utilities
+from member import Member
+from memberlist import memberlist_from_string
+from memberlist_binary import (
+    _header,
+    is_binary_memberlist,
+    memberlist_from_bytes,
+    memberlist_to_bytes,
+    version as binary_version
+)
+from memberlist_journal import MemberlistJournal
+from memberlist_schema import (
+    line_version,
+    headerless_version,
+    header_line,
+    read_header,
+    check_version,
+    upgrade_lines
+)
+
+# tries these specific files
+files = [
+    "memberlists/current_members.txt",
+    "memberlists/old_members.txt",
+    "memberlists/banned_members.txt"
+]
+# tries all memberlist files in these folders
+folders = [
+    "memberlists/banned_members/",
+    "memberlists/current_members/",
+    "memberlists/old_members/"
+]
+# same as the default memberlist_journal_filename setting
+journal_filename = "memberlists/memberlists.journal"
+
+def file_version(filename):
+    """
+    Format and version of a memberlist file, only reads the start of it.
+    Returns ("binary", version), ("text", version) or ("text", None) for a
+    text file without a header line.
+    """
+    with open(filename, "rb") as file:
+        start = file.read(_header.size)
+        if is_binary_memberlist(start):
+            return "binary", _header.unpack_from(start)[1]
+        file.seek(0)
+        return "text", read_header(file.readline().decode("utf-8"))
+
+def _checked(lines, filename):
+    """
+    Passes on lines, after making sure each reads as a member.
+    """
+    for num, line in enumerate(lines):
+        try:
+            Member.from_string(line)
+        except Exception as ex:
+            raise ValueError(
+                f"Member {num + 1} of {filename} is not valid after upgrading: "
+                f"{ex!r}\n{line}"
+            )
+        yield line
+
+def migrate_file(filename, headerless=headerless_version, journal=None,
+                 entries=()):
+    """
+    Rewrites a memberlist file in the current version. headerless is the
+    version of a text file without a header line. Applies the changes to the
+    file in the journal entries first. Returns the number of members, None
+    if the file was in the current version already.
+    """
+    kind, version = file_version(filename)
+    if kind == "binary":
+        with open(filename, "rb") as file:
+            data = file.read()
+        mlist = memberlist_from_bytes(data)
+        changed = version != binary_version
+        if len(entries) > 0:
+            lines = [memb.to_string() for memb in mlist]
+            if journal.apply(entries, filename, lines) > 0:
+                mlist = memberlist_from_string("\n".join(lines))
+                changed = True
+        if not changed:
+            return None
+        utilities.write_file_atomic(memberlist_to_bytes(mlist), filename)
+        return len(mlist)
+    has_header = version is not None
+    if not has_header:
+        version = headerless
+    check_version(version)
+    if len(entries) > 0:
+        # the journal needs the whole list, only for the main lists
+        lines = list(_file_lines(filename, has_header))
+        applied = journal.apply(entries, filename, lines)
+        if applied == 0 and has_header and version == line_version:
+            return None
+    elif has_header and version == line_version:
+        return None
+    else:
+        lines = _file_lines(filename, has_header)
+    return _write_lines(
+        filename, _checked(upgrade_lines(lines, version), filename)
+    )
+
+def _file_lines(filename, has_header):
+    """
+    Generator of the member lines of a text file, reads a line at a time.
+    """
+    with open(filename, "r", encoding="utf-8") as file:
+        if has_header:
+            file.readline()
+        for line in file:
+            yield line.rstrip("\r\n")
+
+def _write_lines(filename, lines):
+    """
+    Writes the member lines to filename in the current version, the same as
+    memberlist_to_disk would. Returns the number of lines.
+    """
+    count = 0
+    with utilities.atomic_writer(filename) as out:
+        out.write(header_line())
+        for line in lines:
+            out.write("\n" + line)
+            count += 1
+    return count
+
+def _report(filename, count):
+    if count is None:
+        print(f"{filename} is up to date")
+    else:
+        print(f"migrated {filename} ({count} members)")
+
+def migrate_all(headerless, workers=None):
+    """
+    Migrates all the memberlist files, returns the number that failed.
+    """
+    start = time.perf_counter()
+    failed = 0
+    journal = MemberlistJournal(journal_filename)
+    entries = journal.read()
+    for filename in files:
+        if not os.path.isfile(filename):
+            continue
+        try:
+            _report(
+                filename, migrate_file(filename, headerless, journal, entries)
+            )
+        except Exception:
+            print(f"unable to migrate {filename}")
+            print(traceback.format_exc())
+            failed += 1
+    if len(entries) > 0 and failed == 0:
+        # all in the files now
+        utilities.write_file_atomic("", journal_filename)
+    filenames = []
+    for folder in folders:
+        if not os.path.isdir(folder):
+            continue
+        for file in sorted(os.listdir(folder)):
+            # skip ingame data journals and other non memberlist files
+            if file.endswith(".txt"):
+                filenames.append(os.path.join(folder, file))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(migrate_file, filename, headerless): filename
+            for filename in filenames
+        }
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                _report(filename, future.result())
+            except Exception:
+                print(f"unable to migrate {filename}")
+                print(traceback.format_exc())
+                failed += 1
+    print(
+        f"done in {time.perf_counter() - start:.1f}s, "
+        f"{failed} files could not be migrated"
+    )
+    return failed
+
+if __name__ == "__main__":
+    usage = (
+        "usage: python migrate_memberlists.py [--from <version>] "
+        "[--workers <number>]"
+    )
+    options = {"--from": headerless_version, "--workers": None}
+    args = sys.argv[1:]
+    try:
+        while len(args) > 0:
+            option = args.pop(0)
+            if option not in options or len(args) == 0:
+                raise ValueError(option)
+            options[option] = int(args.pop(0))
+    except ValueError:
+        print(usage)
+        sys.exit(1)
+    if migrate_all(options["--from"], options["--workers"]) > 0:
+        sys.exit(1)
@@ -0,0 +1,145 @@
+"""
+Fuzzy search index over the names and old names of the members in the
+memberlists, for findmember.
+
+Scoring every name with rapidfuzz is slow for large lists, so the index
+keeps a map of the bigrams (every 2 characters in a row) of each name, with
+its words sorted the way partial_token_sort_ratio compares them. A search
+only scores the names that have a bigram in common with the query, in one
+batch with rapidfuzz process.extract on the preprocessed names.
+
+Skipping the others is safe: with no 2 characters in a row in common, m
+matching characters need at least m - 1 others in between, which gives a
+similarity of at most 2m / (3m - 1). That is only above the cutoff for
+m <= 2, so when the shorter of the two is 3 characters or less. Names that
+short are always scored, queries that short score all names.
+"""
+from operator import attrgetter
+from rapidfuzz import fuzz, process, utils
+
+# same as memberlist_get_all, partial matches need a similarity above this
+partial_cutoff = 75
+
+# names this short or shorter can match without a bigram in common
+_short_length = 3
+
+def _bigrams(text):
+    return {text[i:i+2] for i in range(len(text) - 1)}
+
+def _prepare(name):
+    """
+    name preprocessed and with its words sorted, like
+    partial_token_sort_ratio does before comparing.
+    """
+    return " ".join(sorted(utils.default_process(name).split()))
+
+class NameSearchIndex:
+    """
+    NameSearchIndex(), update() it with the memberlists before searching.
+    """
+    def __init__(self):
+        # what the index was built from, see update
+        self._source = None
+        self._memberlists = []
+        # per name: (list number, member, is old name)
+        self._owners = []
+        # preprocessed names, in the same order as _owners
+        self._choices = []
+        # lowercase name -> owner numbers, for the exact matches
+        self._exact = dict()
+        # bigram -> owner numbers
+        self._bigrams = dict()
+        # owner numbers of the names too short to filter by bigrams
+        self._short = []
+    def update(self, memberlists):
+        """
+        Indexes the names in memberlists, a list of memberlists. Only builds
+        the index again if the names in them changed since the last update.
+        """
+        # by id(), the index keeps the members so their ids stay unique
+        source = [
+            (
+                list(map(id, mlist)),
+                list(map(attrgetter("name"), mlist)),
+                [tuple(memb.old_names) for memb in mlist]
+            )
+            for mlist in memberlists
+        ]
+        if source == self._source:
+            return
+        self._source = source
+        self._memberlists = memberlists
+        self._owners = []
+        self._choices = []
+        self._exact = dict()
+        self._bigrams = dict()
+        self._short = []
+        for list_num, mlist in enumerate(memberlists):
+            for memb in mlist:
+                self._add(list_num, memb, memb.name, False)
+                for old_name in memb.old_names:
+                    self._add(list_num, memb, old_name, True)
+    def _add(self, list_num, memb, name, old):
+        num = len(self._owners)
+        self._owners.append((list_num, memb, old))
+        prepared = _prepare(name)
+        self._choices.append(prepared)
+        self._exact.setdefault(name.lower(), []).append(num)
+        if len(prepared) <= _short_length:
+            self._short.append(num)
+        for bigram in _bigrams(prepared):
+            self._bigrams.setdefault(bigram, []).append(num)
+    def search(self, query, partial=False):
+        """
+        Members with a name or old name matching query, a list of
+        (member, result_type) per memberlist. Ordered like
+        memberlist_get_all: exact name matches, then exact old name matches,
+        then if partial the members with a similar name or old name, most
+        similar first.
+        """
+        results = [[] for _ in self._memberlists]
+        found = set()
+        exact = self._exact.get(query.lower(), [])
+        # names before old names, members in list order
+        for old, result_type in [(False, "exactname"), (True, "oldname")]:
+            for num in exact:
+                list_num, memb, is_old = self._owners[num]
+                if is_old == old and id(memb) not in found:
+                    found.add(id(memb))
+                    results[list_num].append((memb, result_type))
+        if not partial:
+            return results
+        prepared = _prepare(query)
+        candidates = None
+        if len(prepared) > _short_length:
+            candidates = set(self._short).union(*(
+                self._bigrams.get(bigram, ()) for bigram in _bigrams(prepared)
+            ))
+            # scoring them all is faster than picking out most of them
+            if len(candidates) > len(self._choices) // 2:
+                candidates = None
+        if candidates is None:
+            candidates = range(len(self._choices))
+            choices = self._choices
+        else:
+            candidates = sorted(candidates)
+            choices = [self._choices[num] for num in candidates]
+        matches = process.extract(
+            prepared,
+            choices,
+            # choices are token sorted already, same as partial_token_sort_ratio
+            scorer=fuzz.partial_ratio,
+            processor=None,
+            score_cutoff=partial_cutoff,
+            limit=None
+        )
+        # sorted by score, ties in list order
+        for _, score, pos in matches:
+            if score <= partial_cutoff:
+                continue
+            list_num, memb, _ = self._owners[candidates[pos]]
+            if id(memb) in found:
+                continue
+            found.add(id(memb))
+            results[list_num].append((memb, "partialname"))
+        return results
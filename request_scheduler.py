@@ -0,0 +1,122 @@
+"""
+Schedules requests to the rs api for clantrack. Keeps the request rate below a
+limit shared by all fetching threads, spaces out retries with increasing
+delays and keeps a list of requests that kept failing to try again later.
+"""
+import random
+import threading
+import time
+import requests
+
+class RequestScheduler:
+    """
+    RequestScheduler(rate, burst, max_attempts, retry_budget).
+
+    rate - requests per second allowed on average (token bucket refill rate).
+    burst - requests that can be made at once after being idle for a while.
+    max_attempts - attempts per request before giving up on it.
+    retry_budget - total retries allowed for a run, once it is used up any
+        failing request gives up right away instead of being retried.
+    """
+    def __init__(
+        self,
+        rate=10,
+        burst=10,
+        max_attempts=5,
+        retry_budget=250,
+        base_delay=1,
+        max_delay=60
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.retry_budget = retry_budget
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # stats for the run, nice for logging and benchmarks.
+        self.requests = 0
+        self.retries = 0
+        # items that failed all attempts, to be retried at the end of a run.
+        self.dead_letters = list()
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+    def acquire(self):
+        """
+        Waits until the rate limit allows another request to be made.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst,
+                    self._tokens + (now - self._last_refill) * self.rate
+                )
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.requests += 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            # sleep outside of lock so other threads can check in meanwhile
+            time.sleep(wait_time)
+    def backoff(self, attempt):
+        """
+        Sleeps before retry number attempt. Exponential delay with full
+        jitter, so throttled threads don't all retry at the same moment.
+        """
+        delay = min(self.max_delay, self.base_delay * pow(2, attempt))
+        time.sleep(random.uniform(0, delay))
+    def _use_retry(self):
+        """
+        Takes a retry from the budget. Returns False if it was used up.
+        """
+        with self._lock:
+            if self.retries >= self.retry_budget:
+                return False
+            self.retries += 1
+            return True
+    def refill_budget(self, retry_budget=None):
+        """
+        Makes the retry budget available again, used for a second pass.
+        """
+        with self._lock:
+            if retry_budget is not None:
+                self.retry_budget = retry_budget
+            self.retries = 0
+    def get(self, session, url, timeout=10):
+        """
+        Makes a rate limited get request with retries. Responses with a 429
+        (too many requests) or 5xx status and connection errors are retried.
+
+        Returns the response, or None if all attempts failed.
+        """
+        for attempt in range(self.max_attempts):
+            self.acquire()
+            try:
+                resp = session.get(url, timeout=timeout)
+                if (
+                    resp.status_code != requests.codes["too_many_requests"]
+                    and resp.status_code < 500
+                ):
+                    return resp
+            except requests.exceptions.RequestException:
+                pass
+            if attempt + 1 == self.max_attempts or not self._use_retry():
+                return None
+            self.backoff(attempt)
+        return None
+    def dead_letter(self, item):
+        """
+        Stores an item that failed all attempts to be retried later.
+        """
+        with self._lock:
+            self.dead_letters.append(item)
+    def take_dead_letters(self):
+        """
+        Returns and clears the items that failed all attempts.
+        """
+        with self._lock:
+            items = self.dead_letters
+            self.dead_letters = list()
+        return items
@@ -4,7 +4,7 @@ import zerobot_common
 import utilities
 from zerobot_common import SheetParams, gem_exceptions
 from member import Member, valid_profile_link , valid_discord_id, Warning
-from memberlist import memberlist_sort_name, memberlist_get
+from memberlist import memberlist_sort_name, memberlist_get, memberlist_add
 from rankchecks import match_disc_ingame, match_disc_site
 from gspread_formatting import format_cell_range, format_cell_ranges, CellFormat, Color
 
@@ -99,7 +99,7 @@ def load_sheet_changes(memberlist, sheet):
         member = memberlist_get(memberlist, x.entry_id, type="entry_id")
         if member is None:
             # no existing match found, add to memberlist
-            memberlist.append(x)
+            memberlist_add(memberlist, x)
         else:
             # match found, load sheet data
             member.load_sheet_changes(x)
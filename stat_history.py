@@ -0,0 +1,166 @@
+"""
+History of the stats of all current members, a row per member per day.
+
+Stored by column, each column is a file of int64 values with the rows of all
+days after each other. A query only reads the columns it needs, and only the
+rows of the days it needs (numpy memmap), instead of loading full memberlist
+backups. The days file has a (day, first row, row count) entry per day, the
+day as days since 1970-01-01.
+
+    memberlists/stats/days.bin
+    memberlists/stats/<column>.bin
+
+Columns: entry_id, clan_xp, kills, hosts, runescore, clues and xp_<skill>
+for every skill in skill_labels.
+"""
+import os
+import numpy
+from member import skill_labels
+from membertable import MemberTable, epoch_days
+
+stat_columns = (
+    ["clan_xp", "kills", "hosts", "runescore", "clues"]
+    + ["xp_" + label for label in skill_labels]
+)
+_columns = ["entry_id"] + stat_columns
+
+def _column_values(table):
+    """
+    Dictionary of column -> values for all members in a MemberTable.
+    """
+    values = {
+        "entry_id": numpy.array(
+            [memb.entry_id for memb in table.members], dtype=numpy.int64
+        ),
+        "clan_xp": table.clan_xp,
+        "kills": table.kills,
+        "hosts": table.hosts(),
+        "runescore": table.activity("runescore"),
+        "clues": table.total_clues()
+    }
+    for label in skill_labels:
+        values["xp_" + label] = table.skill(label)
+    return values
+
+class StatHistory:
+    """
+    StatHistory(folder).
+    """
+    def __init__(self, folder):
+        self.folder = folder
+    def _filename(self, column):
+        return os.path.join(self.folder, column + ".bin")
+    def _days(self):
+        """
+        Array of (day, first row, row count) for each stored day.
+        """
+        filename = self._filename("days")
+        if not os.path.exists(filename):
+            return numpy.zeros((0, 3), dtype=numpy.int64)
+        days = numpy.fromfile(filename, dtype="<i8")
+        # ignore a partly written last entry
+        return days[:len(days) - len(days) % 3].reshape(-1, 3)
+    def dates(self):
+        """
+        Stored days, as days since 1970-01-01.
+        """
+        return self._days()[:, 0].tolist()
+    def append(self, date, memberlist):
+        """
+        Adds the stats of the members in memberlist for date (a datetime).
+        Storing the last stored day again replaces it.
+        """
+        day = epoch_days(date)
+        days = self._days()
+        if len(days) > 0 and day < days[-1, 0]:
+            raise ValueError(f"Stats after {date} are already stored")
+        if len(days) > 0 and day == days[-1, 0]:
+            days = days[:-1]
+        rows = 0 if len(days) == 0 else int(days[-1, 1] + days[-1, 2])
+        values = _column_values(MemberTable(memberlist))
+        os.makedirs(self.folder, exist_ok=True)
+        for column in _columns:
+            # drops the rows of a replaced day or a crashed append
+            with open(self._filename(column), "ab") as file:
+                file.truncate(rows * 8)
+                file.write(values[column].astype("<i8").tobytes())
+        days = numpy.vstack([days, [[day, rows, len(memberlist)]]])
+        # written last, the rows only count once they are in here
+        with open(self._filename("days.tmp"), "wb") as file:
+            file.write(days.astype("<i8").tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(self._filename("days.tmp"), self._filename("days"))
+    def _day_entry(self, date):
+        """
+        The (day, first row, row count) of the last stored day on or before
+        date, None if there is none.
+        """
+        days = self._days()
+        pos = numpy.searchsorted(days[:, 0], epoch_days(date), side="right")
+        if pos == 0:
+            return None
+        return days[pos - 1]
+    def _read(self, column, start, count):
+        if count == 0:
+            return numpy.zeros(0, dtype=numpy.int64)
+        return numpy.memmap(
+            self._filename(column), dtype="<i8", mode="r",
+            offset=start * 8, shape=(count,)
+        )
+    def day(self, date, columns):
+        """
+        Dictionary of column -> values for the last stored day on or before
+        date, including the entry_id column. None if there is no such day.
+        """
+        entry = self._day_entry(date)
+        if entry is None:
+            return None
+        _, start, count = entry
+        return {
+            column: numpy.array(self._read(column, start, count))
+            for column in ["entry_id"] + list(columns)
+        }
+    def gains(self, column, date_1, date_2):
+        """
+        Gains in column from date_1 to date_2 for members that were there on
+        both days. Returns (entry_ids, gains), None if a day is missing.
+        """
+        first = self.day(date_1, [column])
+        last = self.day(date_2, [column])
+        if first is None or last is None:
+            return None
+        _, rows_1, rows_2 = numpy.intersect1d(
+            first["entry_id"], last["entry_id"],
+            assume_unique=False, return_indices=True
+        )
+        return (
+            last["entry_id"][rows_2],
+            last[column][rows_2] - first[column][rows_1]
+        )
+    def top_gains(self, column, date_1, date_2, count=10):
+        """
+        The count members with the most gained in column, as a list of
+        (entry_id, gain). Empty if a day is missing.
+        """
+        result = self.gains(column, date_1, date_2)
+        if result is None:
+            return []
+        entry_ids, gains = result
+        order = numpy.argsort(-gains, kind="stable")[:count]
+        return [(int(entry_ids[i]), int(gains[i])) for i in order]
+    def history(self, entry_id, column):
+        """
+        Values of column for one member entry on every stored day it was
+        there. Returns (days, values), days as days since 1970-01-01.
+        """
+        days = self._days()
+        if len(days) == 0:
+            return [], []
+        total = int(days[-1, 1] + days[-1, 2])
+        rows = numpy.nonzero(self._read("entry_id", 0, total) == entry_id)[0]
+        values = self._read(column, 0, total)[rows]
+        row_days = days[
+            numpy.searchsorted(days[:, 1], rows, side="right") - 1, 0
+        ]
+        return row_days.tolist(), values.tolist()
@@ -0,0 +1,155 @@
+"""
+Compact storage for the labelled stats of a member (skills, activities,
+notify role counts). All values of a member are kept in a single array of
+64 bit integers instead of a dict with a small list per stat.
+
+The blocks behave like the dicts they replace: they are indexed by label and
+have keys(), values() and items(). Reading a stat gives a StatRow, a view
+that acts like the old [rank, xp, level] list and writes through to the
+block. Assigning a stat copies the values into the block, so two members
+never share stat lists by accident.
+"""
+from array import array
+
+class StatRow:
+    """
+    StatRow(data, offset, width), a list-like view on one stat of a block.
+    """
+    __slots__ = ("_data", "_offset", "_width")
+    def __init__(self, data, offset, width):
+        self._data = data
+        self._offset = offset
+        self._width = width
+    def _index(self, i):
+        if i < 0:
+            i += self._width
+        if i < 0 or i >= self._width:
+            raise IndexError("stat index out of range")
+        return self._offset + i
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.tolist()[i]
+        return self._data[self._index(i)]
+    def __setitem__(self, i, value):
+        self._data[self._index(i)] = value
+    def __len__(self):
+        return self._width
+    def __iter__(self):
+        return iter(self._data[self._offset:self._offset+self._width])
+    def tolist(self):
+        return self._data[self._offset:self._offset+self._width].tolist()
+    def __eq__(self, other):
+        try:
+            return self.tolist() == list(other)
+        except TypeError:
+            return NotImplemented
+    def __repr__(self):
+        # same as the list it replaces, the memberlist files rely on this.
+        return repr(self.tolist())
+
+class StatBlock:
+    """
+    Base class for the stat blocks, subclasses set the labels and width.
+    StatBlock(values=None), values is an optional dict of label -> values.
+
+    labels - stat names, in the order they are stored in.
+    width - number of values per stat. With width 0 each stat is a single
+        int instead of a StatRow.
+    """
+    __slots__ = ("data",)
+    labels = []
+    index = {}
+    width = 1
+    def __init__(self, values=None):
+        self.data = array("q", bytes(8 * len(self.labels) * self._size()))
+        if values is not None:
+            for label, value in values.items():
+                self[label] = value
+    @classmethod
+    def from_string(cls, txt):
+        """
+        Reads a block from its text in a memberlist file, the repr of its 
+        values like [[1, 2, 3], [4, 5, 6]]. Lists written by older versions
+        can have fewer stats, the missing ones are left at 0.
+        """
+        block = cls()
+        txt = txt.replace("[", "").replace("]", "")
+        if txt == "":
+            return block
+        values = array("q", map(int, txt.split(",")))
+        if len(values) > len(block.data) or len(values) % cls._size() != 0:
+            raise ValueError(f"Not a valid {cls.__name__} string: {txt}")
+        block.data[:len(values)] = values
+        return block
+    @classmethod
+    def _size(cls):
+        return max(cls.width, 1)
+    @classmethod
+    def make_index(cls, labels):
+        """
+        Returns the label -> position lookup for labels.
+        """
+        return {label: num for num, label in enumerate(labels)}
+    def __getitem__(self, label):
+        offset = self.index[label] * self._size()
+        if self.width == 0:
+            return self.data[offset]
+        return StatRow(self.data, offset, self.width)
+    def __setitem__(self, label, value):
+        offset = self.index[label] * self._size()
+        if self.width == 0:
+            self.data[offset] = value
+            return
+        if len(value) != self.width:
+            raise ValueError(
+                f"{label} needs {self.width} values, got {len(value)}"
+            )
+        self.data[offset:offset+self.width] = array("q", value)
+    def __contains__(self, label):
+        return label in self.index
+    def __iter__(self):
+        return iter(self.labels)
+    def __len__(self):
+        return len(self.labels)
+    def keys(self):
+        return list(self.labels)
+    def values(self):
+        return [self[label] for label in self.labels]
+    def items(self):
+        return [(label, self[label]) for label in self.labels]
+    def get(self, label, default=None):
+        if label in self.index:
+            return self[label]
+        return default
+    def column(self, num):
+        """
+        Returns value num of every stat in label order, as an array. Faster
+        than going through the stats one by one.
+        """
+        return self.data[num::self._size()]
+    def to_string(self):
+        """
+        The text of the block in a memberlist file, the values as a list:
+        [[1, 2, 3], [4, 5, 6]], or [1, 2] for blocks of single values.
+        """
+        values = self.data.tolist()
+        if self.width == 0:
+            return repr(values)
+        width = self.width
+        return repr([
+            values[i:i+width] for i in range(0, len(values), width)
+        ])
+    def copy(self):
+        block = type(self).__new__(type(self))
+        block.data = array("q", self.data)
+        return block
+    def __copy__(self):
+        return self.copy()
+    def __deepcopy__(self, memo):
+        return self.copy()
+    def __eq__(self, other):
+        if isinstance(other, StatBlock):
+            return self.labels == other.labels and self.data == other.data
+        return NotImplemented
+    def __repr__(self):
+        return repr({label: self[label] for label in self.labels})
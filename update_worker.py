@@ -0,0 +1,137 @@
+"""
+Runs the heavy parts of the daily update in a separate worker process: the
+ingame data retrieval and the memberlist comparison. This keeps the bot's
+event loop free to answer discord (heartbeats, commands) while they run.
+
+The worker sends short progress messages back to the bot through a queue,
+results are returned to the bot when the worker function finishes.
+
+The worker does not load zerobot_common or any of the cogs: no logging in to
+google, no sheets, no second bot. It only imports this module and what
+clantrack needs, the few settings it uses are passed to it when it starts.
+Nothing imported here may import zerobot_common.
+"""
+import asyncio
+import multiprocessing
+import queue
+import sys
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import clantrack
+import utilities
+from clantrack import get_ingame_memberlist, compare_lists
+
+# progress queue of the worker process, set when the worker starts.
+_progress_queue = None
+
+def _init_worker(progress_queue, clantrack_settings, formats):
+    global _progress_queue
+    _progress_queue = progress_queue
+    clantrack.configure(clantrack_settings)
+    (
+        utilities.dateformat,
+        utilities.timeformat,
+        utilities.datetimeformat
+    ) = formats
+
+@contextmanager
+def _main_hidden():
+    """
+    A spawned process first runs the main script of the parent again, as
+    __mp_main__. For the bot that is ZeroBot.py, which loads zerobot_common,
+    every cog and builds a second bot. Hides the main script while starting
+    the worker, so it only imports the modules its functions need.
+    """
+    main = sys.modules["__main__"]
+    spec = getattr(main, "__spec__", None)
+    missing = object()
+    file = main.__dict__.pop("__file__", missing)
+    main.__spec__ = None
+    try:
+        yield
+    finally:
+        main.__spec__ = spec
+        if file is not missing:
+            main.__file__ = file
+
+def report(msg):
+    """
+    Sends a progress message to the bot, only works inside the worker.
+    """
+    if _progress_queue is not None:
+        _progress_queue.put(msg)
+
+def fetch_ingame_memberlist(highest_id, highest_entry_id):
+    report("Collecting ingame data for update...")
+    return get_ingame_memberlist(highest_id, highest_entry_id, progress=report)
+
+def compare_memberlists(ingame_members, current_members):
+    report("Comparing memberlist with ingame data...")
+    return compare_lists(ingame_members, current_members)
+
+class UpdateWorker:
+    """
+    UpdateWorker(on_progress), on_progress is an async function that gets
+    called in the bot with each progress message from the worker.
+
+    The worker process is started on first use and kept for later updates.
+    """
+    def __init__(self, on_progress):
+        self.on_progress = on_progress
+        self._pool = None
+        self._queue = None
+    def _start(self):
+        # spawn a fresh process, forking a process with a running discord 
+        # connection and threads is not safe.
+        ctx = multiprocessing.get_context("spawn")
+        self._queue = ctx.Queue()
+        self._pool = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(
+                self._queue,
+                dict(clantrack.settings),
+                (
+                    utilities.dateformat,
+                    utilities.timeformat,
+                    utilities.datetimeformat
+                )
+            )
+        )
+    async def _relay_progress(self):
+        while True:
+            try:
+                msg = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            await self.on_progress(msg)
+    async def run(self, func, *args):
+        """
+        Runs func(*args) in the worker process and returns its result. Relays
+        progress messages while waiting. func must be a module level function
+        and args must be picklable.
+        """
+        if self._pool is None:
+            self._start()
+        loop = asyncio.get_running_loop()
+        # the worker process is started on the first submit
+        with _main_hidden():
+            future = loop.run_in_executor(self._pool, func, *args)
+        while not future.done():
+            await asyncio.wait({future}, timeout=1)
+            await self._relay_progress()
+        # messages sent just before finishing
+        await self._relay_progress()
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # worker died, start a new one next time.
+            self.shutdown()
+            raise
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._queue = None
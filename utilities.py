@@ -1,5 +1,6 @@
 import json
 import os
+from contextlib import contextmanager
 import requests
 import discord
 from datetime import datetime
@@ -45,6 +46,55 @@ def write_file(object, filename):
     file = open(filename, 'w', encoding="utf-8")
     file.write(str(object))
     file.close()
+def write_file_atomic(data, filename):
+    """
+    Writes data (str or bytes) to filename so that the file is either fully
+    replaced or left as it was, never half written. Writes a temporary file
+    next to it, flushes it to the disk and then renames it over filename.
+    Creates parent directories for filename if they do not exist.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    with atomic_writer(filename, "wb") as file:
+        file.write(data)
+@contextmanager
+def atomic_writer(filename, mode="w"):
+    """
+    Opens a file to write filename in parts, same as write_file_atomic. 
+    filename is only replaced once the with block ends without an exception, 
+    mode is "w" for text (utf-8) or "wb" for bytes.
+    """
+    dirname = os.path.dirname(filename)
+    if (dirname != ''):
+        os.makedirs(dirname, exist_ok=True)
+    temp_filename = filename + ".tmp"
+    if "b" in mode:
+        file = open(temp_filename, mode)
+    else:
+        # no \r\n on windows, same bytes as write_file_atomic would write
+        file = open(temp_filename, mode, encoding="utf-8", newline="")
+    try:
+        yield file
+        file.flush()
+        os.fsync(file.fileno())
+    except BaseException:
+        file.close()
+        os.remove(temp_filename)
+        raise
+    file.close()
+    os.replace(temp_filename, filename)
+    _fsync_dir(dirname)
+def _fsync_dir(dirname):
+    """
+    Makes a rename in dirname survive a power loss, only possible on UNIX.
+    """
+    if os.name != "posix":
+        return
+    fd = os.open(dirname or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
 def delete_file(filename):
     """
     A safe wrapper for deleting a file from disk.
@@ -166,10 +216,17 @@ def _strToDate(str, df=None) :
     Returns date representation of string.
     Result is None if string could not be read as date.
     """
+    if df is None:
+        df = dateformat
     try:
-        if df is not None:
-            return datetime.strptime(str, df)
-        return datetime.strptime(str, dateformat)
+        # fast path for yyyy-mm-dd, strptime is slow for whole memberlists
+        if (
+            df == '%Y-%m-%d' and len(str) == 10
+            and str[4] == '-' and str[7] == '-'
+            and str[:4].isdigit() and str[5:7].isdigit() and str[8:].isdigit()
+        ):
+            return datetime(int(str[:4]), int(str[5:7]), int(str[8:]))
+        return datetime.strptime(str, df)
     except ValueError :
         return None
 boolstr = {
@@ -42,6 +42,10 @@ from oauth2client.service_account import ServiceAccountCredentials
 # zerobot modules
 import utilities
 from utilities import load_json, rank_index
+import memberlist
+import clantrack
+from memberlist_journal import MemberlistJournal
+from memberlist_db import MemberlistDB
 
 from logfile import LogFile
 # main logfile for the bot
@@ -106,6 +110,41 @@ daily_update_time = settings.get("daily_update_time")
 # Controls if update should skip fetching latest ingame info if a recent copy
 # exists locally.
 use_cached_ingame_data = settings.get("use_cached_ingame_data", True)
+# How many members to retrieve ingame stats for at the same time during the
+# update. Higher is faster, but too high can get you blocked by the rs api.
+ingame_fetch_workers = settings.get("ingame_fetch_workers", 10)
+# Limits for requests to the rs api during the update: requests per second,
+# attempts for each request, and total retries allowed for one update. 
+rs_api_requests_per_second = settings.get("rs_api_requests_per_second", 10)
+rs_api_max_attempts = settings.get("rs_api_max_attempts", 5)
+rs_api_retry_budget = settings.get("rs_api_retry_budget", 250)
+# Keeps the hiscore stats of each player on disk for some hours, a repeated
+# update only fetches players whose stats expired. Players not on the hiscores
+# are kept longer, their stats are unlikely to show up very soon.
+hiscore_cache_enabled = settings.get("hiscore_cache_enabled", True)
+hiscore_cache_ttl_hours = settings.get("hiscore_cache_ttl_hours", 12)
+hiscore_cache_negative_ttl_hours = settings.get(
+    "hiscore_cache_negative_ttl_hours", 72
+)
+clantrack.configure({
+    "rs_api_clan_name": rs_api_clan_name,
+    "use_cached_ingame_data": use_cached_ingame_data,
+    "ingame_fetch_workers": ingame_fetch_workers,
+    "rs_api_requests_per_second": rs_api_requests_per_second,
+    "rs_api_max_attempts": rs_api_max_attempts,
+    "rs_api_retry_budget": rs_api_retry_budget,
+    "hiscore_cache_enabled": hiscore_cache_enabled,
+    "hiscore_cache_ttl_hours": hiscore_cache_ttl_hours,
+    "hiscore_cache_negative_ttl_hours": hiscore_cache_negative_ttl_hours
+})
+# Polls the clan memberlist every few minutes and refreshes hiscore stats of
+# members that gained clan xp first, others are spread out over the day.
+# Keeps last active dates fresh and leaves less to fetch for the daily update.
+rolling_refresh_enabled = settings.get("rolling_refresh_enabled", False)
+rolling_refresh_minutes = settings.get("rolling_refresh_minutes", 30)
+# Runs the ingame data retrieval and comparison of the daily update in a 
+# separate process, so the bot stays responsive on discord meanwhile.
+update_worker_enabled = settings.get("update_worker_enabled", True)
 
 # Check the discord_ranks.json settings file. Make sure that file contains
 # your discord ranks in the right order! (highest at the top). You will need
@@ -155,6 +194,54 @@ inactive_days = 30
 current_members_filename = settings.get("current_members_filename")
 old_members_filename = settings.get("old_members_filename")
 banned_members_filename = settings.get("banned_members_filename")
+# Format the memberlists are written to disk in. "text" is tab separated and
+# readable in any text editor, "binary" is a lot smaller and faster to load.
+# Files of either format can be read, so this can be switched any time. Run
+# convert_memberlists.py to convert all existing files at once.
+memberlist.file_format = settings.get("memberlist_file_format", "text")
+# Edits made to the memberlists are appended to this journal instead of 
+# rewriting the full lists every time, the full lists are written again once
+# the journal reaches memberlist_journal_max_kb.
+if settings.get("memberlist_journal_enabled", True):
+    memberlist.journal = MemberlistJournal(
+        settings.get(
+            "memberlist_journal_filename", "memberlists/memberlists.journal"
+        ),
+        max_size=settings.get("memberlist_journal_max_kb", 1024) * 1024
+    )
+# Edits to the memberlists are written to disk, and the sheet, by a 
+# background task at most once every memberlist_write_seconds instead of at
+# every unlock. Bursts of edits are written once. 0 writes them at every 
+# unlock, edits made less than this long before a crash can be lost otherwise.
+memberlist_write_seconds = settings.get("memberlist_write_seconds", 10)
+# All changes to the memberlists are also kept in an event log, with a full
+# snapshot every memberlist_snapshot_days. Used to look up how the lists were
+# on dates without a memberlist backup, for clanstats.
+memberlist_events_enabled = settings.get("memberlist_events_enabled", True)
+memberlist_snapshot_days = settings.get("memberlist_snapshot_days", 7)
+# Snapshots and events older than this many days are removed, 0 keeps them all.
+memberlist_events_keep_days = settings.get("memberlist_events_keep_days", 365)
+# Daily backups of the memberlists go in a compressed archive that only 
+# stores what changed since the day before, with a full copy every 
+# memberlist_archive_keyframe_days. Run archive_memberlists.py once to move
+# existing backup files into it.
+memberlist_archive_enabled = settings.get("memberlist_archive_enabled", True)
+memberlist_archive_keyframe_days = settings.get(
+    "memberlist_archive_keyframe_days", 7
+)
+# Keeps the daily stats of all current members by column, for the topgains
+# command. Answers stat questions between any two days of the update.
+stat_history_enabled = settings.get("stat_history_enabled", True)
+# Keeps a copy of the memberlists in an SQLite database as well. Lookups of
+# single members go through the database then, which is a lot faster for
+# large lists. The memberlist files are still written and loaded at start,
+# the database is synced from them and only used while it is up to date.
+if settings.get("memberlist_database_enabled", False):
+    memberlist.database = MemberlistDB(
+        settings.get(
+            "memberlist_database_filename", "memberlists/memberlists.db"
+        )
+    )
 
 
 